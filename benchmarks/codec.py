@@ -0,0 +1,53 @@
+from statwolf import codec
+
+import random
+import timeit
+
+ROWS = 200000
+REPEAT = 3
+
+def payload(rows):
+    rnd = random.Random(42)
+    countries = [ 'Italy', 'Germany', 'France', 'Spain', 'United Kingdom', 'Switzerland' ]
+    devices = [ 'desktop', 'mobile', 'tablet' ]
+
+    return {
+        "Success": True,
+        "Data": {
+            "meta": [
+                { "name": "ga:date", "type": "Date", "internalName": "ga_date" },
+                { "name": "ga:country", "type": "String", "internalName": "ga_country" },
+                { "name": "ga:deviceCategory", "type": "String", "internalName": "ga_deviceCategory" },
+                { "name": "ga:sessions", "type": "UInt64", "internalName": "ga_sessions" },
+                { "name": "ga:bounceRate", "type": "Float64", "internalName": "ga_bounceRate" }
+            ],
+            "data": [{
+                "ga:date": "2019-%02d-%02d" % (rnd.randint(1, 12), rnd.randint(1, 28)),
+                "ga:country": rnd.choice(countries),
+                "ga:deviceCategory": rnd.choice(devices),
+                "ga:sessions": rnd.randint(0, 100000),
+                "ga:bounceRate": rnd.random() * 100
+            } for i in range(rows) ],
+            "totals": None,
+            "rows": rows,
+            "rows_before_limit_at_least": rows,
+            "hasErrors": False,
+            "errorMessage": None
+        }
+    }
+
+def run():
+    data = payload(ROWS)
+    encoded = codec.Json().dumps(data)
+
+    print('payload: %d rows, %.1f MB' % (ROWS, len(encoded) / 1e6))
+    print('%-8s %12s %12s' % ('codec', 'loads (s)', 'dumps (s)'))
+
+    for name in codec.available():
+        c = codec.create(name)
+        loads = min(timeit.repeat(lambda: c.loads(encoded), number=1, repeat=REPEAT))
+        dumps = min(timeit.repeat(lambda: c.dumps(data), number=1, repeat=REPEAT))
+        print('%-8s %12.3f %12.3f' % (name, loads, dumps))
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,44 @@
+from statwolf import frames
+
+import pandas
+import random
+import timeit
+
+ROWS = 500000
+REPEAT = 3
+
+META = [
+    { "name": "ga:date", "type": "Date" },
+    { "name": "ga:country", "type": "String" },
+    { "name": "ga:deviceCategory", "type": "String" },
+    { "name": "ga:sessions", "type": "UInt64" },
+    { "name": "ga:bounceRate", "type": "Float64" }
+]
+
+# list of row dicts, the shape the pipeline loader and SQL.stream hand to toDataFrame
+def rows(count):
+    rnd = random.Random(42)
+    countries = [ 'Italy', 'Germany', 'France', 'Spain', 'United Kingdom', 'Switzerland' ]
+    devices = [ 'desktop', 'mobile', 'tablet' ]
+
+    return [{
+        "ga:date": "2019-%02d-%02d" % (rnd.randint(1, 12), rnd.randint(1, 28)),
+        "ga:country": rnd.choice(countries),
+        "ga:deviceCategory": rnd.choice(devices),
+        "ga:sessions": str(rnd.randint(0, 100000)),
+        "ga:bounceRate": rnd.random() * 100
+    } for i in range(count) ]
+
+def run():
+    data = rows(ROWS)
+
+    print('%d rows' % ROWS)
+    print('%-8s %12s %12s' % ('mode', 'build (s)', 'memory (MB)'))
+
+    for name, fn in [ ('untyped', lambda: pandas.DataFrame(data)), ('typed', lambda: frames.toDataFrame(data, META)) ]:
+        elapsed = min(timeit.repeat(fn, number=1, repeat=REPEAT))
+        memory = fn().memory_usage(deep=True).sum() / 1e6
+        print('%-8s %12.3f %12.1f' % (name, elapsed, memory))
+
+if __name__ == '__main__':
+    run()
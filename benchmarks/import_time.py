@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+REPEAT = 5
+BUDGET = float(os.environ.get('SW_IMPORT_BUDGET', '0.35'))
+LAZY = [ 'azure', 'dill', 'pandas', 'asyncio' ]
+
+SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+import statwolf
+print(time.perf_counter() - start)
+print(','.join(m for m in %r if m in sys.modules))
+''' % LAZY
+
+def measure():
+    out = subprocess.check_output([ sys.executable, '-c', SCRIPT ], env=dict(os.environ, PYTHONPATH='.')).decode().split('\n')
+
+    return float(out[0]), [ m for m in out[1].split(',') if m != '' ]
+
+def run():
+    samples = [ measure() for i in range(REPEAT) ]
+    best = min(s[0] for s in samples)
+    loaded = samples[0][1]
+
+    print('import statwolf: %.3f s (best of %d, budget %.3f s)' % (best, REPEAT, BUDGET))
+
+    if len(loaded) > 0:
+        print('eagerly imported: ' + ', '.join(loaded))
+
+    if best > BUDGET or len(loaded) > 0:
+        print('import time regression')
+        sys.exit(1)
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,56 @@
+from statwolf.mocks import ContextMock
+from statwolf.services.datasource import StepBuilder, Pipeline
+
+import json
+import timeit
+
+STEPS = 10
+EXECUTIONS = 5000
+REPEAT = 3
+
+def step(element, panel):
+    element['meta']['steps'] = element['meta'].get('steps', 0) + panel['params']['increment']
+
+    return element
+
+def pipeline():
+    builder = StepBuilder('/root/v1/full', {}, ContextMock())
+
+    for i in range(STEPS):
+        builder.transform(step, { "increment": 1 })
+
+    return Pipeline({}, builder._pipeline[1:], builder._context)
+
+def interpreted(p):
+    element = {
+        "meta": {},
+        "dataset": []
+    }
+
+    for h in p._pipeline:
+        panel = {
+            'statwolf': p._context.http,
+            'params': json.loads(h['params']),
+            'query': p._query,
+            'deadline': None
+        }
+        exec(h['source'], {}, { 'element': element, 'panel': panel })
+        element = panel['newElement']
+
+    return element
+
+def compiled(p):
+    return p.execute()
+
+def run():
+    p = pipeline()
+
+    print('%d steps, %d executions' % (STEPS, EXECUTIONS))
+    print('%-12s %14s' % ('mode', 'execute (us)'))
+
+    for name, fn in [ ('interpreted', interpreted), ('compiled', compiled) ]:
+        elapsed = min(timeit.repeat(lambda: fn(p), number=EXECUTIONS, repeat=REPEAT))
+        print('%-12s %14.1f' % (name, elapsed / EXECUTIONS * 1e6))
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,21 @@
+import statwolf
+import asyncio
+import os
+
+host = os.environ.get('SW_HOST', 'https://a.statwolf.endpoint/dashboard')
+username = os.environ.get('SW_USERNAME', 'the user')
+password = os.environ.get('SW_PASSWORD', 'a real password')
+
+async def main():
+    async with statwolf.create_async({
+        "host": host,
+        "username": username,
+        "password": password
+    }, concurrency=4) as client:
+        # Many queries in flight over the same connection pool
+        results = await asyncio.gather(*[ client.sql.query('select ' + str(i)) for i in range(8) ])
+
+        for r in results:
+            print(r)
+
+asyncio.run(main())
@@ -0,0 +1,13 @@
+import statwolf
+import os
+
+host = os.environ.get('SW_HOST', 'https://a.statwolf.endpoint/dashboard')
+username = os.environ.get('SW_USERNAME', 'the user')
+password = os.environ.get('SW_PASSWORD', 'a real password')
+
+# One client per process: services share connections, caches and metrics
+with statwolf.Client({ "host": host, "username": username, "password": password }) as client:
+    print(client.sql.query('select 1'))
+    print(client.datasource.list())
+
+    print(client.context.metrics.prometheus())
@@ -33,3 +33,19 @@ print(pipeline.execute())
 override = pipeline.query().metrics([ 'mySql', 'myAvg' ])
 
 print(pipeline.execute(override))
+
+# Stream large results chunk by chunk and combine them at the end
+def rows(element, panel):
+    return { "meta": element['meta'], "dataset": len(element['dataset']) }
+
+def total(element, panel):
+    return { "meta": element['meta'], "dataset": sum(element['dataset']) }
+
+counter = source.builder().take("1000000").steps()\
+        .transform(rows, chunked=True)\
+        .reduce(total).build()
+
+print(counter.execute(chunkSize=50000))
+
+for chunk in source.builder().take("1000000").steps().build().stream(chunkSize=50000):
+    print(chunk['dataset'])
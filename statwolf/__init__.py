@@ -1,11 +1,30 @@
 from statwolf.exceptions import *
 
 from statwolf.services import *
-from statwolf import services, http, tempfile
+from statwolf import services, http, tempfile, cache
+from statwolf import deadline as deadlines
 
-from azure.storage.blob import BlockBlobService
+from statwolf.deadline import Deadline
 from itertools import islice
 
+import threading
+import time
+
+DEFAULT_BLOB_TTL = 3600
+DEFAULT_SCHEMA_CACHE_SIZE = 128
+DEFAULT_SCHEMA_TTL = 300
+DEFAULT_HINT_CACHE_SIZE = 1024
+DEFAULT_HINT_TTL = 60
+DEFAULT_CATALOGUE_TTL = 60
+DEFAULT_STEP_CACHE_SIZE = 256
+DEFAULT_STEP_TTL = 300
+DEFAULT_STEP_CACHE_BYTES = 256 * 1024 * 1024
+
+def _blockBlobService(**kwargs):
+    from azure.storage.blob import BlockBlobService
+
+    return BlockBlobService(**kwargs)
+
 class Context:
     def __init__(self, config):
         if not "host" in config or not "username" in config or not "password" in config:
@@ -19,22 +38,42 @@ class Context:
 
         self.loader = getattr
         self.http = http.create(self.config)
+        self.codec = self.http.codec
+        self.metrics = self.http.metrics
         self.openFile = open
-        self._blockBlobService = BlockBlobService
+        self._blockBlobService = _blockBlobService
         self.islice = islice
+        self.clock = time.monotonic
+        self._blob = None
+        self._blobExpiresAt = 0
+        self._blobLock = threading.Lock()
+        self.schemas = cache.create(config, "schema", DEFAULT_SCHEMA_CACHE_SIZE, DEFAULT_SCHEMA_TTL)
+        self.hints = cache.hints(config, DEFAULT_HINT_CACHE_SIZE, DEFAULT_HINT_TTL)
+        self.catalogue = cache.LRUCache(1, config.get("catalogueTtl", DEFAULT_CATALOGUE_TTL))
+        self.steps = cache.steps(config, DEFAULT_STEP_CACHE_SIZE, DEFAULT_STEP_TTL, DEFAULT_STEP_CACHE_BYTES)
 
     def toDashboard(self, url):
         return self.config['root'] + url
 
-    def blob(self):
-        url = self.toDashboard('/v1/datasetimport/env')
-        config = self.http.post(url).json()["Data"]
+    def blob(self, deadline=None, refresh=False):
+        with self._blobLock:
+            if not refresh and self._blob != None and self.clock() < self._blobExpiresAt:
+                return self._blob
+
+            url = self.toDashboard('/v1/datasetimport/env')
+            config = self.http.post(url, **deadlines.options(deadline)).json()["Data"]
+
+            self._blob = self._blockBlobService(connection_string=config["connectionString"]),  config["baseUrl"]
+            self._blobExpiresAt = self.clock() + self.config.get("blobTtl", DEFAULT_BLOB_TTL)
 
-        return self._blockBlobService(connection_string=config["connectionString"]),  config["baseUrl"]
+            return self._blob
 
     def tempFile(self):
         return tempfile.TempFile.create()
 
+    def close(self):
+        self.http.close()
+
 def _internal_create(context, service):
     serviceModule = context.loader(services, service)
 
@@ -42,3 +81,54 @@ def _internal_create(context, service):
 
 def create(config, service):
     return _internal_create(Context(config.copy()), service)
+
+class Client:
+    def __init__(self, config):
+        self.context = Context(config.copy())
+        self._services = {}
+        self._lock = threading.Lock()
+
+    def service(self, name):
+        with self._lock:
+            if name not in self._services:
+                self._services[name] = _internal_create(self.context, name)
+
+            return self._services[name]
+
+    @property
+    def datasource(self):
+        return self.service("datasource")
+
+    @property
+    def fragment(self):
+        return self.service("fragment")
+
+    @property
+    def sql(self):
+        return self.service("sql")
+
+    @property
+    def statwolfml(self):
+        return self.service("statwolfml")
+
+    def close(self):
+        self.context.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+def create_async(config, service=None, concurrency=None):
+    from statwolf import aio
+
+    if concurrency == None:
+        concurrency = aio.DEFAULT_CONCURRENCY
+
+    config = config.copy()
+    config.setdefault("poolMaxSize", concurrency)
+
+    client = aio.AsyncClient(Client(config), aio.Runner(concurrency))
+
+    return client if service == None else aio.OwnedService(client, service)
@@ -0,0 +1,184 @@
+import asyncio
+
+from statwolf.parallel import BulkResult
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+DEFAULT_CONCURRENCY = 10
+
+AWAITABLE = {
+    "SQL": [ "query" ],
+    "Datasource": [ "list", "catalogue", "exists", "explore", "exploreMany", "delete", "deleteMany" ],
+    "DatasourceInstance": [ "schema", "dimensions", "metrics", "filters", "dimension", "metric", "filter", "raw", "prefetch", "prefetchValues" ],
+    "Field": [ "values" ],
+    "PipelineBuilder": [ "update" ],
+    "Pipeline": [ "execute", "executeMany", "streamTo" ],
+    "Blob": [ "upload" ],
+    "FragmentInstance": [ "data", "params", "create", "link", "currentDatasource" ],
+    "StatwolfML": [ "preprocess", "apply" ]
+}
+
+STREAMING = {
+    "SQL": [ "stream" ],
+    "Pipeline": [ "stream" ]
+}
+
+class Runner:
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY):
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    async def run(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+
+        return await loop.run_in_executor(self._executor, partial(method, *args, **kwargs))
+
+    async def iterate(self, method, *args, **kwargs):
+        iterator = await self.run(lambda: iter(method(*args, **kwargs)))
+        done = object()
+
+        try:
+            while True:
+                item = await self.run(next, iterator, done)
+
+                if item is done:
+                    return
+
+                yield item
+        finally:
+            if hasattr(iterator, 'close'):
+                await self.run(iterator.close)
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+class AsyncService:
+    def __init__(self, target, runner):
+        self._target = target
+        self._runner = runner
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+
+        if not callable(attr):
+            return attr
+
+        if name in AWAITABLE.get(type(self._target).__name__, []):
+            async def awaitable(*args, **kwargs):
+                result = await self._runner.run(attr, *_unwrap(args), **_unwrap(kwargs))
+                return wrap(result, self._runner)
+
+            return awaitable
+
+        if name in STREAMING.get(type(self._target).__name__, []):
+            async def iterable(*args, **kwargs):
+                async for item in self._runner.iterate(attr, *_unwrap(args), **_unwrap(kwargs)):
+                    yield wrap(item, self._runner)
+
+            return iterable
+
+        def method(*args, **kwargs):
+            return wrap(attr(*_unwrap(args), **_unwrap(kwargs)), self._runner)
+
+        return method
+
+    def __contains__(self, item):
+        return _target(item) in self._target
+
+    def __iter__(self):
+        return ( wrap(v, self._runner) for v in self._target )
+
+    def __len__(self):
+        return len(self._target)
+
+    def __repr__(self):
+        return repr(self._target)
+
+class AsyncClient:
+    def __init__(self, client, runner):
+        self.context = client.context
+        self._client = client
+        self._runner = runner
+
+    def service(self, name):
+        return AsyncService(self._client.service(name), self._runner)
+
+    @property
+    def datasource(self):
+        return self.service("datasource")
+
+    @property
+    def fragment(self):
+        return self.service("fragment")
+
+    @property
+    def sql(self):
+        return self.service("sql")
+
+    @property
+    def statwolfml(self):
+        return self.service("statwolfml")
+
+    def close(self):
+        self._runner.shutdown()
+        self._client.close()
+
+    async def aclose(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+class OwnedService(AsyncService):
+    def __init__(self, client, name):
+        super(OwnedService, self).__init__(client._client.service(name), client._runner)
+        self._owner = client
+
+    def close(self):
+        self._owner.close()
+
+    async def aclose(self):
+        await self._owner.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.aclose()
+
+def wrap(value, runner):
+    if isinstance(value, list):
+        return [ wrap(v, runner) for v in value ]
+
+    if isinstance(value, BulkResult):
+        value.results = { k: wrap(v, runner) for k, v in value.results.items() }
+        return value
+
+    if type(value).__module__.startswith('statwolf.services'):
+        return AsyncService(value, runner)
+
+    return value
+
+def _unwrap(args):
+    if isinstance(args, dict):
+        return { k: _target(v) for k, v in args.items() }
+
+    return tuple(_target(v) for v in args)
+
+def _target(value):
+    if isinstance(value, list):
+        return [ _target(v) for v in value ]
+
+    if isinstance(value, tuple):
+        return tuple(_target(v) for v in value)
+
+    return value._target if isinstance(value, AsyncService) else value
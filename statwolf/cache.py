@@ -0,0 +1,193 @@
+from collections import OrderedDict
+
+import sys
+import threading
+import time
+
+class Entry:
+    def __init__(self, value, expiresAt, tag=None, digest=None, size=0):
+        self.value = value
+        self.expiresAt = expiresAt
+        self.tag = tag
+        self.digest = digest
+        self.size = size
+
+class LRUCache:
+    def __init__(self, maxSize=128, ttl=300, clock=time.monotonic, maxBytes=None, sizeof=None):
+        self.maxSize = maxSize
+        self.ttl = ttl
+        self.clock = clock
+        self.maxBytes = maxBytes
+        self.sizeof = sizeof
+        self._bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = { "hits": 0, "misses": 0, "evictions": 0 }
+
+    def get(self, key):
+        entry = self.entry(key)
+
+        if entry == None or not self.isFresh(entry):
+            return None
+
+        return entry.value
+
+    def entry(self, key):
+        with self._lock:
+            entry = self._entries.get(key, None)
+
+            if entry == None or not self.isFresh(entry):
+                self._stats["misses"] += 1
+            else:
+                self._stats["hits"] += 1
+                self._entries.move_to_end(key)
+
+            return entry
+
+    def isFresh(self, entry):
+        return self.clock() < entry.expiresAt
+
+    def set(self, key, value, tag=None, digest=None):
+        size = self.sizeof(value) if self.sizeof != None else 0
+
+        with self._lock:
+            self._discard(key)
+
+            if self.maxBytes != None and size > self.maxBytes:
+                return value
+
+            self._entries[key] = Entry(value, self.clock() + self.ttl, tag, digest, size)
+            self._bytes += size
+
+            while len(self._entries) > self.maxSize or (self.maxBytes != None and self._bytes > self.maxBytes):
+                self._bytes -= self._entries.popitem(last=False)[1].size
+                self._stats["evictions"] += 1
+
+        return value
+
+    def touch(self, key):
+        with self._lock:
+            entry = self._entries.get(key, None)
+
+            if entry != None:
+                entry.expiresAt = self.clock() + self.ttl
+                self._entries.move_to_end(key)
+
+            return entry
+
+    def invalidate(self, key):
+        with self._lock:
+            self._discard(key)
+
+    def invalidateWhere(self, predicate):
+        with self._lock:
+            for key in [ k for k in self._entries if predicate(k) ]:
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+
+            if self.maxBytes != None:
+                stats["bytes"] = self._bytes
+
+            return stats
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+
+        if entry != None:
+            self._bytes -= entry.size
+
+    def __len__(self):
+        return len(self._entries)
+
+class HintCache:
+    def __init__(self, entries, limit=None, match='contains'):
+        self.entries = entries
+        self.limit = limit
+        self.match = match
+        self._lock = threading.Lock()
+        self._stats = { "hits": 0, "narrowed": 0, "misses": 0 }
+
+    def lookup(self, sourceid, field, hint):
+        hint = hint or ''
+        values = self._values(self.entries.get((sourceid, field, hint)))
+
+        if values != None:
+            return self._count("hits", values)
+
+        for end in range(len(hint) - 1, -1, -1):
+            entry = self.entries.get((sourceid, field, hint[:end]))
+
+            if entry != None and entry[1]:
+                values = [ v for v in entry[0] if self._matches(v, hint) ]
+                self.entries.set((sourceid, field, hint), (values, True))
+
+                return self._count("narrowed", list(values))
+
+        return self._count("misses", None)
+
+    def store(self, sourceid, field, hint, values):
+        if isinstance(values, list):
+            complete = self.limit != None and len(values) < self.limit
+            self.entries.set((sourceid, field, hint or ''), (list(values), complete))
+
+        return values
+
+    def invalidate(self, sourceid):
+        self.entries.invalidateWhere(lambda key: key[0] == sourceid)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+
+        entries = self.entries.stats()
+        stats["evictions"] = entries["evictions"]
+        stats["size"] = entries["size"]
+
+        return stats
+
+    def _values(self, entry):
+        return None if entry == None else list(entry[0])
+
+    def _matches(self, value, hint):
+        value = str(value).lower()
+        hint = hint.lower()
+
+        return value.startswith(hint) if self.match == 'prefix' else hint in value
+
+    def _count(self, name, values):
+        with self._lock:
+            self._stats[name] += 1
+
+        return values
+
+def sizeof(value):
+    if hasattr(value, 'memory_usage'):
+        usage = value.memory_usage(deep=True)
+
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(sizeof(k) + sizeof(v) for k, v in value.items())
+
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+
+    return sys.getsizeof(value)
+
+def create(config, prefix, maxSize, ttl):
+    return LRUCache(config.get(prefix + "CacheSize", maxSize), config.get(prefix + "Ttl", ttl))
+
+def hints(config, maxSize, ttl):
+    return HintCache(create(config, "hint", maxSize, ttl), config.get("hintLimit", None), config.get("hintMatch", "contains"))
+
+def steps(config, maxSize, ttl, maxBytes):
+    return LRUCache(config.get("stepCacheSize", maxSize), config.get("stepTtl", ttl), maxBytes=config.get("stepCacheBytes", maxBytes), sizeof=sizeof)
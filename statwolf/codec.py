@@ -0,0 +1,92 @@
+from statwolf.exceptions import StatwolfException
+
+import json
+
+class Json:
+    name = 'json'
+
+    def dumps(self, data):
+        return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+    def canonical(self, data):
+        return json.dumps(data, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+class Orjson:
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def dumps(self, data):
+        return self._orjson.dumps(data)
+
+    def canonical(self, data):
+        return self._orjson.dumps(data, option=self._orjson.OPT_SORT_KEYS)
+
+    def loads(self, data):
+        return self._orjson.loads(data)
+
+class Ujson:
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self._ujson = ujson
+
+    def dumps(self, data):
+        return self._ujson.dumps(data, ensure_ascii=False).encode('utf-8')
+
+    def canonical(self, data):
+        return self._ujson.dumps(data, ensure_ascii=False, sort_keys=True).encode('utf-8')
+
+    def loads(self, data):
+        return self._ujson.loads(data)
+
+CODECS = {
+    'json': Json,
+    'orjson': Orjson,
+    'ujson': Ujson
+}
+
+def canonical(codec, data):
+    if hasattr(codec, 'canonical'):
+        return codec.canonical(data)
+
+    return codec.dumps(data)
+
+def available():
+    names = []
+
+    for name, factory in CODECS.items():
+        try:
+            factory()
+            names.append(name)
+        except ImportError:
+            pass
+
+    return names
+
+def create(name='json'):
+    if not isinstance(name, str):
+        return name
+
+    if name == 'auto':
+        for candidate in [ 'orjson', 'ujson' ]:
+            try:
+                return CODECS[candidate]()
+            except ImportError:
+                pass
+
+        return Json()
+
+    if name not in CODECS:
+        raise StatwolfException('Unknown codec ' + name + '. Available codecs: ' + ', '.join([ 'auto' ] + list(CODECS.keys())))
+
+    try:
+        return CODECS[name]()
+    except ImportError:
+        raise StatwolfException('Codec ' + name + ' is not installed')
@@ -0,0 +1,50 @@
+from statwolf.exceptions import StatwolfException
+
+import gzip
+
+DEFAULT_MIN_SIZE = 1024
+
+class Gzip:
+    name = 'gzip'
+
+    def __init__(self, level=6):
+        self._level = level
+
+    def compress(self, data):
+        return gzip.compress(data, self._level)
+
+class Zstd:
+    name = 'zstd'
+
+    def __init__(self, level=3):
+        import zstandard
+        self._zstandard = zstandard
+        self._level = level
+
+    def compress(self, data):
+        return self._zstandard.ZstdCompressor(level=self._level).compress(data)
+
+ENCODINGS = {
+    'gzip': Gzip,
+    'zstd': Zstd
+}
+
+def create(name):
+    if name is None:
+        return None
+
+    if name not in ENCODINGS:
+        raise StatwolfException('Unknown compression ' + name + '. Available compressions: ' + ', '.join(ENCODINGS.keys()))
+
+    try:
+        return ENCODINGS[name]()
+    except ImportError:
+        raise StatwolfException('Compression ' + name + ' is not installed')
+
+def acceptEncoding():
+    try:
+        from urllib3.util.request import ACCEPT_ENCODING
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip,deflate'
+
+    return ACCEPT_ENCODING
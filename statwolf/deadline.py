@@ -0,0 +1,37 @@
+from statwolf.exceptions import DeadlineExceededException
+
+import time
+
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 300.0
+
+class Deadline:
+    def __init__(self, seconds, clock=time.monotonic):
+        self.clock = clock
+        self._expiresAt = clock() + seconds
+
+    def remaining(self):
+        return max(0.0, self._expiresAt - self.clock())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check(self):
+        if self.expired():
+            raise DeadlineExceededException()
+
+        return self
+
+    def timeout(self, connect, read):
+        remaining = self.check().remaining()
+
+        return (min(connect, remaining), min(read, remaining))
+
+def create(value):
+    if value is None or isinstance(value, Deadline):
+        return value
+
+    return Deadline(value)
+
+def options(deadline):
+    return {} if deadline is None else { "deadline": deadline }
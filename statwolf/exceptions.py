@@ -4,3 +4,11 @@ class StatwolfException(Exception):
 class InvalidConfigException(StatwolfException):
     def __init__(self):
         super(InvalidConfigException, self).__init__("Invalid config: the following parameters are mandatory.\n* host\n* username\n* password")
+
+class CircuitOpenException(StatwolfException):
+    def __init__(self, host):
+        super(CircuitOpenException, self).__init__("Circuit open: too many failures talking to " + host + ". Retry later.")
+
+class DeadlineExceededException(StatwolfException):
+    def __init__(self):
+        super(DeadlineExceededException, self).__init__("Deadline exceeded: the operation did not complete within its time budget.")
@@ -0,0 +1,119 @@
+import re
+
+INTEGER = re.compile(r'^U?Int\d+$')
+FLOAT = re.compile(r'^(Float\d+|Decimal.*)$')
+DATETIME = re.compile(r'^(Date|Date32|DateTime|DateTime64)(\(.*\))?$')
+STRING = re.compile(r'^(String|FixedString\(\d+\)|Enum(8|16)?\(.*\))$')
+WRAPPERS = re.compile(r'^(Nullable|LowCardinality)\((.*)\)$')
+
+def kind(type):
+    type = type or ''
+
+    while WRAPPERS.match(type):
+        type = WRAPPERS.match(type).group(2)
+
+    if INTEGER.match(type):
+        return 'integer'
+
+    if FLOAT.match(type):
+        return 'float'
+
+    if DATETIME.match(type):
+        return 'datetime'
+
+    if STRING.match(type):
+        return 'string'
+
+    return None
+
+def toDataFrame(rows, meta=None, categorical=True):
+    import pandas
+
+    meta = _schema(meta)
+    names = [ m["name"] for m in meta ]
+    columns = _columns(rows, names)
+
+    if columns == None:
+        return pandas.DataFrame(rows)
+
+    types = { m["name"]: m.get("type", None) for m in meta }
+    frame = pandas.DataFrame({ name: _convert(columns[name], types[name]) for name in names })
+
+    return categorize(frame, meta) if categorical else frame
+
+def retype(frame, meta, categorical=True):
+    for m in _schema(meta):
+        name = m["name"]
+
+        if name in frame.columns and frame[name].dtype == object and kind(m.get("type", None)) in ('integer', 'float', 'datetime'):
+            frame[name] = _convert(frame[name], m["type"])
+
+    return categorize(frame, meta) if categorical else frame
+
+def categorize(frame, meta):
+    for m in _schema(meta):
+        name = m["name"]
+
+        if name not in frame.columns or len(frame) == 0 or kind(m.get("type", None)) != 'string':
+            continue
+
+        try:
+            if frame[name].nunique() <= len(frame) / 2:
+                frame[name] = frame[name].astype('category')
+        except TypeError:
+            pass
+
+    return frame
+
+def _schema(meta):
+    if not isinstance(meta, list):
+        return []
+
+    return [ m for m in meta if isinstance(m, dict) and "name" in m ]
+
+def _columns(rows, names):
+    if len(names) == 0 or len(set(names)) != len(names):
+        return None
+
+    if isinstance(rows, dict):
+        return rows if all(n in rows for n in names) else None
+
+    if len(rows) == 0:
+        return None
+
+    first = rows[0]
+
+    if isinstance(first, (list, tuple)) and len(first) == len(names):
+        return dict(zip(names, zip(*rows)))
+
+    if isinstance(first, dict) and len(first) == len(names) and all(n in first for n in names):
+        return { n: [ row.get(n, None) for row in rows ] for n in names }
+
+    return None
+
+def _convert(values, type):
+    import pandas
+
+    k = kind(type)
+
+    try:
+        if k == 'integer' or k == 'float':
+            return _numeric(pandas.Series(values), 'int64' if k == 'integer' else 'float64')
+
+        if k == 'datetime':
+            return pandas.to_datetime(pandas.Series(values), errors='coerce')
+    except (ValueError, TypeError):
+        pass
+
+    return pandas.Series(values, dtype=object) if k == 'string' else pandas.Series(values)
+
+def _numeric(series, dtype):
+    import pandas
+
+    if series.dtype != object:
+        return series
+
+    try:
+        return series.astype(dtype)
+    except (ValueError, TypeError, OverflowError):
+        return pandas.to_numeric(series)
@@ -1,29 +1,237 @@
+from statwolf import retry, singleflight, codec, compression, metrics
+from statwolf import deadline as deadlines
+from statwolf.exceptions import DeadlineExceededException
+
 import requests
+import threading
+import time
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+STREAM_CHUNK_SIZE = 65536
+
+class Response:
+    def __init__(self, raw, codec, bytesSent=0, bytesSentRaw=0, onStreamed=None):
+        self._raw = raw
+        self._codec = codec
+        self._onStreamed = onStreamed
+        self.bytesSent = bytesSent
+        self.bytesSentRaw = bytesSentRaw
+        self.bytesReceivedRaw = 0
+        self.bytesReceived = 0
+
+        if onStreamed is None:
+            self.bytesReceivedRaw = len(raw.content)
+            self.bytesReceived = _wireBytes(raw, self.bytesReceivedRaw)
+
+        self._lock = threading.Lock()
+        self._decoded = False
+        self._json = None
+
+    def json(self):
+        with self._lock:
+            if not self._decoded:
+                self._json = self._codec.loads(self._raw.content)
+                self._decoded = True
+
+        return self._json
+
+    def iterContent(self, chunkSize=STREAM_CHUNK_SIZE):
+        try:
+            for chunk in self._raw.iter_content(chunkSize):
+                self.bytesReceivedRaw += len(chunk)
+                yield chunk
+        finally:
+            self.bytesReceived = _wireBytes(self._raw, self.bytesReceivedRaw)
+            self._raw.close()
+
+            if self._onStreamed is not None:
+                self._onStreamed(self)
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+def _wireBytes(raw, default):
+    try:
+        return int(raw.raw.tell())
+    except (AttributeError, TypeError, ValueError):
+        return default
 
 class Http:
     def __init__(self, r, config):
         self._config = config
+        self._session = r.Session()
+        self.codec = codec.create(config.get("codec", "json"))
+        self._compression = compression.create(config.get("compress", None))
+        self._compressMinSize = config.get("compressMinSize", compression.DEFAULT_MIN_SIZE)
+        self._counters = { "requests": 0, "bytesSent": 0, "bytesSentRaw": 0, "bytesReceived": 0, "bytesReceivedRaw": 0 }
+        self._countersLock = threading.Lock()
+        self._retry = retry.policy(config)
+        self._breaker = retry.breaker(config)
+        self._flights = singleflight.SingleFlight()
+        self.metrics = metrics.create(config)
+        self.clock = time.perf_counter
+        self._timeouts = (
+            config.get("connectTimeout", deadlines.DEFAULT_CONNECT_TIMEOUT),
+            config.get("readTimeout", deadlines.DEFAULT_READ_TIMEOUT)
+        )
+
+        adapter = r.adapters.HTTPAdapter(
+            pool_connections=config.get("poolConnections", DEFAULT_POOL_CONNECTIONS),
+            pool_maxsize=config.get("poolMaxSize", DEFAULT_POOL_MAXSIZE)
+        )
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+        if config.get("keepAlive", True) == False:
+            self._session.headers["Connection"] = "close"
+
+        self._session.headers["Accept-Encoding"] = compression.acceptEncoding()
+
+    def get(self, path, deadline=None):
+        return self._coalesce('GET', path, None, True, deadlines.create(deadline), None)
+
+    def post(self, path, data=None, stream=False, deadline=None, headers=None):
+        deadline = deadlines.create(deadline)
+
+        if stream:
+            return self._request('POST', path, self._encode(data), self._retry.isIdempotent(path), True, deadline, headers)
+
+        return self._coalesce('POST', path, data, self._retry.isIdempotent(path), deadline, headers)
+
+    def close(self):
+        self._session.close()
+
+    def counters(self):
+        with self._countersLock:
+            return dict(self._counters)
+
+    def _coalesce(self, verb, path, data, idempotent, deadline, headers):
+        if not idempotent or self._config.get("singleFlight", True) == False:
+            return self._request(verb, path, self._encode(data), idempotent, False, deadline, headers)
+
+        body = self._encode(data, canonical=True)
+        key = singleflight.key(verb, path, body, headers)
 
-    def get(self, path):
-        return self._request(requests.get, path, None)
+        return self._flights.do(key, lambda: self._request(verb, path, body, idempotent, False, deadline, headers), deadline)
 
-    def post(self, path, data=None):
-        return self._request(requests.post, path, data)
+    def _encode(self, data, canonical=False):
+        if data == None:
+            return None
 
-    def _request(self, method, path, data):
+        return codec.canonical(self.codec, data) if canonical else self.codec.dumps(data)
+
+    def _request(self, verb, path, body, idempotent, stream=False, deadline=None, headers=None):
+        event = {
+            "endpoint": metrics.endpoint(path, self._config.get("root", "")),
+            "method": verb,
+            "status": None,
+            "latency": 0.0,
+            "bytesSent": 0,
+            "bytesReceived": 0,
+            "retries": 0
+        }
+
+        self.metrics.started(event["endpoint"])
+        start = self.clock()
+
+        try:
+            response = self._send(getattr(self._session, verb.lower()), path, body, idempotent, stream, deadline, headers, event)
+            event["status"] = response.status_code
+            event["bytesSent"] = response.bytesSent
+            event["bytesReceived"] = response.bytesReceived
+
+            if stream:
+                response._endpoint = event
+
+            return response
+        except Exception as e:
+            event["status"] = type(e).__name__
+            raise
+        finally:
+            event["latency"] = self.clock() - start
+            self.metrics.finished(event)
+
+    def _send(self, method, path, body, idempotent, stream, deadline, headers, event):
         args = {
             "headers": {
                 "statwolf-auth": self._config["username"] + ":" + self._config["password"]
-            }
+            },
+            "timeout": self._timeouts
         }
 
-        if(data != None):
-            args["json"] = data
+        if headers != None:
+            args["headers"].update(headers)
+
+        if stream:
+            args["stream"] = True
+
+        sent = 0
+        sentRaw = 0
+
+        if(body != None):
+            sentRaw = len(body)
+
+            if self._compression is not None and sentRaw >= self._compressMinSize:
+                body = self._compression.compress(body)
+                args["headers"]["Content-Encoding"] = self._compression.name
+
+            sent = len(body)
+            args["data"] = body
+            args["headers"]["Content-Type"] = "application/json"
 
 
         url = self._config["host"] + path
 
-        return method(url, **args)
+        attempt = 0
+        while True:
+            if deadline is not None:
+                args["timeout"] = deadline.timeout(*self._timeouts)
+
+            self._breaker.allow()
+
+            try:
+                response = method(url, **args)
+            except self._retry.errors as e:
+                self._breaker.failure()
+                if deadline is not None and deadline.expired() and isinstance(e, requests.exceptions.Timeout):
+                    raise DeadlineExceededException() from e
+                if not self._retry.shouldRetry(attempt, idempotent, e, deadline):
+                    raise
+            else:
+                if not self._retry.isFailure(response):
+                    self._breaker.success()
+                    return self._reply(response, sent, sentRaw, stream)
+
+                self._breaker.failure()
+                if not self._retry.shouldRetry(attempt, idempotent, None, deadline):
+                    return self._reply(response, sent, sentRaw, stream)
+
+            self._retry.wait(attempt, deadline)
+            attempt += 1
+            event["retries"] = attempt
+
+    def _reply(self, raw, sent, sentRaw, stream):
+        response = Response(raw, self.codec, sent, sentRaw, self._received if stream else None)
+
+        with self._countersLock:
+            self._counters["requests"] += 1
+            self._counters["bytesSent"] += response.bytesSent
+            self._counters["bytesSentRaw"] += response.bytesSentRaw
+
+        if not stream:
+            self._received(response)
+
+        return response
+
+    def _received(self, response):
+        with self._countersLock:
+            self._counters["bytesReceived"] += response.bytesReceived
+            self._counters["bytesReceivedRaw"] += response.bytesReceivedRaw
+
+        event = getattr(response, '_endpoint', None)
+        if event is not None:
+            self.metrics.received(event["endpoint"], event["method"], response.bytesReceived)
 
 
 def create(config):
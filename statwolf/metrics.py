@@ -0,0 +1,143 @@
+import re
+import threading
+
+DEFAULT_BUCKETS = [ 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0 ]
+
+ENDPOINTS = [
+    (re.compile(r'^/v1/full/[^/]+$'), None),
+    (re.compile(r'^/v1/freehandquery(/.*)?$'), '/v1/freehandquery'),
+    (re.compile(r'^/v1/datasetimport/[^/]+$'), None),
+    (re.compile(r'^/v1/statwolfml/[^/]+$'), None),
+    (re.compile(r'^/fragment/[^/]+/discover$'), '/fragment/{id}/discover'),
+    (re.compile(r'^/fragment/[^/]+$'), '/fragment/{id}')
+]
+
+def endpoint(path, root=''):
+    if root != '/' and path.startswith(root):
+        path = path[len(root):]
+
+    path = '/' + path.lstrip('/')
+
+    for pattern, name in ENDPOINTS:
+        if pattern.match(path):
+            return path if name is None else name
+
+    return 'other'
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [ 0 ] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+class Registry:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._listeners = []
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+        return self
+
+    def started(self, endpoint):
+        with self._lock:
+            self._add(self._gauges, 'statwolf_requests_in_flight', { "endpoint": endpoint }, 1)
+
+    def finished(self, event):
+        labels = { "endpoint": event["endpoint"], "method": event["method"] }
+
+        with self._lock:
+            self._add(self._gauges, 'statwolf_requests_in_flight', { "endpoint": event["endpoint"] }, -1)
+
+            key = ('statwolf_request_duration_seconds', _labels(labels))
+            if key not in self._histograms:
+                self._histograms[key] = Histogram(self._buckets)
+            self._histograms[key].observe(event["latency"])
+
+            self._add(self._counters, 'statwolf_requests_total', dict(labels, status=str(event["status"])), 1)
+            self._add(self._counters, 'statwolf_request_bytes_total', labels, event["bytesSent"])
+            self._add(self._counters, 'statwolf_response_bytes_total', labels, event["bytesReceived"])
+            self._add(self._counters, 'statwolf_retries_total', labels, event["retries"])
+
+        for listener in self._listeners:
+            listener(event)
+
+    def received(self, endpoint, method, amount):
+        with self._lock:
+            self._add(self._counters, 'statwolf_response_bytes_total', { "endpoint": endpoint, "method": method }, amount)
+
+    def counter(self, name, **labels):
+        return self._counters.get((name, _labels(labels)), 0)
+
+    def gauge(self, name, **labels):
+        return self._gauges.get((name, _labels(labels)), 0)
+
+    def histogram(self, name, **labels):
+        return self._histograms.get((name, _labels(labels)), None)
+
+    def prometheus(self):
+        lines = []
+
+        with self._lock:
+            for name, kind, series in [
+                ('statwolf_request_duration_seconds', 'histogram', self._histograms),
+                ('statwolf_requests_total', 'counter', self._counters),
+                ('statwolf_request_bytes_total', 'counter', self._counters),
+                ('statwolf_response_bytes_total', 'counter', self._counters),
+                ('statwolf_retries_total', 'counter', self._counters),
+                ('statwolf_requests_in_flight', 'gauge', self._gauges)
+            ]:
+                lines.append('# TYPE ' + name + ' ' + kind)
+
+                for (metric, labels), value in sorted(series.items()):
+                    if metric != name:
+                        continue
+
+                    if kind != 'histogram':
+                        lines.append(name + _format(labels) + ' ' + _number(value))
+                        continue
+
+                    for bound, count in zip(value.buckets, value.counts):
+                        lines.append(name + '_bucket' + _format(labels + (('le', _number(bound)),)) + ' ' + str(count))
+                    lines.append(name + '_bucket' + _format(labels + (('le', '+Inf'),)) + ' ' + str(value.count))
+                    lines.append(name + '_sum' + _format(labels) + ' ' + _number(value.sum))
+                    lines.append(name + '_count' + _format(labels) + ' ' + str(value.count))
+
+        return '\n'.join(lines) + '\n'
+
+    def _add(self, series, name, labels, amount):
+        key = (name, _labels(labels))
+        series[key] = series.get(key, 0) + amount
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+def _format(labels):
+    if len(labels) == 0:
+        return ''
+
+    escaped = [ k + '="' + str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"' for k, v in labels ]
+
+    return '{' + ','.join(escaped) + '}'
+
+def _number(value):
+    return str(value)
+
+def create(config):
+    registry = config.get("metrics", None)
+
+    return registry if registry is not None else Registry()
@@ -1,15 +1,28 @@
+from statwolf.cache import LRUCache, HintCache, sizeof
+
+import json
+import time
+
 class ResponseMock:
     def __init__(self, defaultReply={"Success": True,"Data": {}}):
         self.DEFAULT_REPLY = defaultReply
+        self.status_code = 200
+        self.headers = {}
 
     def json(self):
         return self.DEFAULT_REPLY
 
+    def iterContent(self, chunkSize=7):
+        content = json.dumps(self.DEFAULT_REPLY).encode('utf-8')
+
+        for i in range(0, len(content), chunkSize):
+            yield content[i:i + chunkSize]
+
 class HttpMock:
-    def post(self, path, body):
+    def post(self, path, body, stream=False, deadline=None, headers=None):
         pass
 
-    def get(self, path):
+    def get(self, path, deadline=None):
         pass
 
 class FileMock:
@@ -31,6 +44,10 @@ class ContextMock:
         self.http = HttpMock()
         self._fileMock = FileMock()
         self._blob = BlobServiceMock()
+        self.schemas = LRUCache()
+        self.hints = HintCache(LRUCache())
+        self.catalogue = LRUCache(1)
+        self.steps = LRUCache(maxBytes=1024 * 1024, sizeof=sizeof)
 
     def toDashboard(self, url):
         return '/root' + url
@@ -38,9 +55,18 @@ class ContextMock:
     def tempFile(self):
         return self._fileMock
 
-    def blob(self):
+    def blob(self, deadline=None, refresh=False):
         return self._blob, 'base url/'
 
 class DatasourceMock:
     def explore(self, sourceid):
         pass
+
+def waitFor(predicate, timeout=5.0):
+    expiresAt = time.monotonic() + timeout
+
+    while not predicate():
+        if time.monotonic() > expiresAt:
+            raise AssertionError('Condition not met within ' + str(timeout) + ' seconds')
+
+        time.sleep(0.001)
@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CONCURRENCY = 10
+
+class BulkResult:
+    def __init__(self, keys, outcomes):
+        self.keys = keys
+        self.results = {}
+        self.errors = {}
+
+        for key, (value, error) in zip(keys, outcomes):
+            if error != None:
+                self.errors[key] = error
+            else:
+                self.results[key] = value
+
+    def ok(self):
+        return len(self.errors) == 0
+
+    def __getitem__(self, key):
+        if key in self.errors:
+            raise self.errors[key]
+
+        return self.results[key]
+
+    def __len__(self):
+        return len(self.keys)
+
+def settle(fn, items, concurrency=DEFAULT_CONCURRENCY):
+    items = list(items)
+
+    def attempt(item):
+        try:
+            return fn(item), None
+        except Exception as e:
+            return None, e
+
+    if concurrency <= 1 or len(items) <= 1:
+        return [ attempt(i) for i in items ]
+
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as executor:
+        return list(executor.map(attempt, items))
+
+def run(fn, items, concurrency=DEFAULT_CONCURRENCY):
+    results = settle(fn, items, concurrency)
+
+    for _, error in results:
+        if error != None:
+            raise error
+
+    return [ value for value, _ in results ]
+
+def bulk(fn, keys, concurrency=DEFAULT_CONCURRENCY):
+    keys = list(keys)
+
+    return BulkResult(keys, settle(fn, keys, concurrency))
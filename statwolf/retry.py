@@ -0,0 +1,108 @@
+from statwolf.exceptions import CircuitOpenException
+from requests.exceptions import ConnectionError, ConnectTimeout, Timeout
+
+import random
+import threading
+import time
+
+IDEMPOTENT_ENDPOINTS = [
+    '/getSchema',
+    '/getHints',
+    '/debugQuery',
+    '/discover',
+    '/listSchemas',
+    '/getDatasetInformation',
+    '/v1/datasetimport/env'
+]
+
+RETRY_STATUSES = [ 502, 503, 504 ]
+
+class RetryPolicy:
+    def __init__(self, retries=3, backoff=0.1, maxBackoff=5.0):
+        self.retries = retries
+        self.backoff = backoff
+        self.maxBackoff = maxBackoff
+        self.errors = (ConnectionError, Timeout)
+        self.random = random.random
+        self.sleep = time.sleep
+
+    def isIdempotent(self, path):
+        return any(path.endswith(e) for e in IDEMPOTENT_ENDPOINTS)
+
+    def shouldRetry(self, attempt, idempotent, error=None, deadline=None):
+        if attempt >= self.retries:
+            return False
+
+        if deadline is not None and deadline.expired():
+            return False
+
+        if idempotent:
+            return True
+
+        return isinstance(error, ConnectTimeout)
+
+    def isFailure(self, response):
+        return response.status_code in RETRY_STATUSES
+
+    def delay(self, attempt):
+        return self.random() * min(self.maxBackoff, self.backoff * (2 ** attempt))
+
+    def wait(self, attempt, deadline=None):
+        delay = self.delay(attempt)
+
+        if deadline is not None:
+            delay = min(delay, deadline.remaining())
+
+        self.sleep(delay)
+
+class CircuitBreaker:
+    def __init__(self, host, threshold=5, resetTimeout=30.0):
+        self.host = host
+        self.threshold = threshold
+        self.resetTimeout = resetTimeout
+        self.clock = time.monotonic
+        self._failures = 0
+        self._openedAt = None
+        self._trialAt = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._openedAt is None:
+                return
+
+            now = self.clock()
+
+            if now - self._openedAt < self.resetTimeout:
+                raise CircuitOpenException(self.host)
+
+            if self._trialAt is not None and now - self._trialAt < self.resetTimeout:
+                raise CircuitOpenException(self.host)
+
+            self._trialAt = now
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            self._openedAt = None
+            self._trialAt = None
+
+    def failure(self):
+        with self._lock:
+            if self._trialAt is not None:
+                self._trialAt = None
+                self._openedAt = self.clock()
+                return
+
+            self._failures += 1
+            if self._failures >= self.threshold:
+                self._openedAt = self.clock()
+
+    def isOpen(self):
+        return self._openedAt is not None
+
+def breaker(config):
+    return CircuitBreaker(config["host"], config.get("circuitThreshold", 5), config.get("circuitReset", 30.0))
+
+def policy(config):
+    return RetryPolicy(config.get("retries", 3), config.get("backoff", 0.1), config.get("maxBackoff", 5.0))
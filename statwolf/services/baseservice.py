@@ -1,9 +1,11 @@
+from statwolf.deadline import options
+
 class BaseService:
 
     def __init__(self, context):
         self._context = context
 
-    def post(self, path, body):
-        result = self._context.http.post(path, body)
+    def post(self, path, body, deadline=None):
+        result = self._context.http.post(path, body, **options(deadline))
 
         return result.json()["Data"]
@@ -1,13 +1,24 @@
 from statwolf.services.baseservice import BaseService
 from statwolf import StatwolfException
+from statwolf import deadline as deadlines
+from statwolf import parallel
+from statwolf import stream as streams
+from statwolf.frames import retype
 from os.path import basename
 
 import json
-from dill.source import getsource
+import hashlib
+import threading
 from textwrap import dedent
 from copy import deepcopy
 
+AUTH_ERRORS = [ 401, 403 ]
+SOURCEID_KEYS = [ "sourceid", "datasetid", "id" ]
+CATALOGUE = 'catalogue'
+
 class Field:
+    __slots__ = ('_sourceid', '_field', '_getHint')
+
     def __init__(self, sourceid, field, getHint):
         self._sourceid = sourceid;
         self._field = field;
@@ -16,7 +27,7 @@ class Field:
     def name(self):
         return self._field;
 
-    def values(self, hint=None):
+    def values(self, hint=None, deadline=None):
         params = {
             "table": self._sourceid,
             "field": self._field,
@@ -25,45 +36,191 @@ class Field:
         if hint != None:
             params["text"] = hint
 
-        return self._getHint(params)
+        return self._getHint(params, deadline)
 
     def __repr__(self):
         return self._field;
 
 class Pipeline(BaseService):
-    def __init__(self, query, pipeline, context):
+    def __init__(self, query, pipeline, context, cache=None):
         super(Pipeline, self).__init__(context)
 
         self._query = query
         self._pipeline = pipeline
+        self._cache = cache
 
     def query(self):
         return FluentQueryEditor(deepcopy(self._query), self._context)
 
-    def execute(self, override=None):
+    def execute(self, override=None, deadline=None, chunkSize=None):
         element = {
             "meta": {},
             "dataset": []
         }
 
         query = self._query
+        deadline = deadlines.create(deadline)
 
         if override != None:
             query = override._params
 
-        for h in self._pipeline:
-            panel = {
-                'statwolf': self._context.http,
-                'params': json.loads(h['params']),
-                'query': query
-            }
-            exec(h['source'], {}, { 'element': element, 'panel': panel })
-            element = panel['newElement']
+        if chunkSize != None:
+            return self._chunked(query, deadline, chunkSize, False)[0]
+
+        keys = _stepKeys(query, self._pipeline) if self._cache != None else []
+        start = 0
+
+        for i in range(len(keys), 0, -1):
+            cached = self._cache.get(keys[i - 1])
+
+            if cached != None:
+                element = deepcopy(cached)
+                start = i
+                break
+
+        for i, h in enumerate(self._pipeline[start:], start):
+            if deadline != None:
+                deadline.check()
+
+            if h.get('reduce', False):
+                element = _reducible(element, None)
+
+            element = self._step(h, element, query, deadline)
+
+            if self._cache != None:
+                self._cache.set(keys[i], deepcopy(element))
 
         return element
 
+    def stream(self, override=None, chunkSize=streams.DEFAULT_BATCH_SIZE, deadline=None):
+        query = self._query if override == None else override._params
+        element, chunks = self._chunked(query, deadlines.create(deadline), chunkSize, True)
+
+        return chunks if chunks != None else iter([ element ])
+
+    def streamTo(self, sink, override=None, chunkSize=streams.DEFAULT_BATCH_SIZE, deadline=None):
+        count = 0
+
+        for element in self.stream(override, chunkSize, deadline):
+            sink(element)
+            count += 1
+
+        return count
+
+    def executeMany(self, overrides, concurrency=parallel.DEFAULT_CONCURRENCY, deadline=None):
+        deadline = deadlines.create(deadline)
+
+        return parallel.run(lambda o: self.execute(o, deadline), overrides, concurrency)
+
+    def _chunked(self, query, deadline, chunkSize, streaming):
+        element = {
+            "meta": {},
+            "dataset": []
+        }
+        chunks = None
+
+        if streaming:
+            _checkStreamable(self._pipeline[1:])
+
+        for h in self._pipeline:
+            if deadline != None:
+                deadline.check()
+
+            if chunks != None and h.get('chunked', False):
+                chunks = self._map(h, chunks, query, deadline)
+                continue
+
+            if h.get('reduce', False):
+                element = self._step(h, _reducible(element, chunks), query, deadline)
+                chunks = None
+                continue
+
+            if chunks != None:
+                if streaming:
+                    _checkStreamable([ h ])
+
+                element = _collect(element["meta"], chunks)
+                chunks = None
+
+            element = self._step(h, element, query, deadline, chunkSize)
+
+            if "chunks" in element:
+                chunks = ({ "meta": element["meta"], "dataset": d } for d in element.pop("chunks"))
+
+        if chunks != None and not streaming:
+            return _collect(element["meta"], chunks), None
+
+        return element, chunks
+
+    def _map(self, h, chunks, query, deadline):
+        for chunk in chunks:
+            if deadline != None:
+                deadline.check()
+
+            yield self._step(h, chunk, query, deadline)
+
+    def _step(self, h, element, query, deadline, chunkSize=None):
+        panel = {
+            'statwolf': self._context.http,
+            'params': deepcopy(h['arguments']),
+            'query': query,
+            'deadline': deadline
+        }
+
+        if chunkSize != None:
+            panel['chunkSize'] = chunkSize
+
+        exec(h['code'], {}, { 'element': element, 'panel': panel })
+
+        return panel['newElement']
+
+def _checkStreamable(steps):
+    for h in steps:
+        if h.get('reduce', False):
+            return
+
+        if not h.get('chunked', False):
+            raise StatwolfException('Step ' + h['name'] + ' is not chunk-safe. Mark it with transform(handler, chunked=True) or add a reduce step before it.')
+
+def _reducible(element, chunks):
+    return {
+        "meta": element["meta"],
+        "dataset": iter([ element["dataset"] ]) if chunks == None else (c["dataset"] for c in chunks)
+    }
+
+def _collect(meta, chunks):
+    import pandas
+
+    datasets = []
+
+    for chunk in chunks:
+        meta = chunk["meta"]
+        datasets.append(chunk["dataset"])
+
+    if len(datasets) == 0:
+        dataset = pandas.DataFrame([])
+    elif all(isinstance(d, pandas.DataFrame) for d in datasets):
+        dataset = retype(pandas.concat(datasets, ignore_index=True), meta.get("schema", None) if isinstance(meta, dict) else None)
+    else:
+        dataset = datasets
+
+    return {
+        "meta": meta,
+        "dataset": dataset
+    }
+
+def _stepKeys(query, pipeline):
+    key = hashlib.sha1(json.dumps(query, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    keys = []
+
+    for h in pipeline:
+        key = hashlib.sha1((key + h['digest']).encode('utf-8')).hexdigest()
+        keys.append(key)
+
+    return keys
+
 class StepBuilder(BaseService):
-    def __init__(self, baseUrl, query, context):
+    def __init__(self, baseUrl, query, context, batchSize=None):
         super(StepBuilder, self).__init__(context)
 
         self._pipeline = []
@@ -71,43 +228,107 @@ class StepBuilder(BaseService):
 
         def loader(element, panel):
             from statwolf import StatwolfException
+            from statwolf.stream import rows
+            from statwolf.deadline import options
+            from statwolf.frames import toDataFrame, retype
             import pandas
 
             params = panel['params']
-            res = panel['statwolf'].post(params['baseUrl'] + '/debugQuery', panel['query']).json()
+            url = params['baseUrl'] + '/debugQuery'
+            deadline = options(panel.get('deadline', None))
+            chunkSize = panel.get('chunkSize', None)
+            batchSize = chunkSize if chunkSize != None else params.get('batchSize', None)
 
-            if res["Data"] == False:
-                raise StatwolfException('Invalid request: maybe an authentication error. Please check that host, username and password are correct')
+            def check(res):
+                if res == False:
+                    raise StatwolfException('Invalid request: maybe an authentication error. Please check that host, username and password are correct')
 
-            res = res["Data"]
+                if res.get('hasErrors', False) == True:
+                    raise StatwolfException(res['errorMessage'])
 
-            if res.get('hasErrors', False) == True:
-                raise StatwolfException(res['errorMessage'])
+                return res
+
+            if batchSize == None:
+                res = check(panel['statwolf'].post(url, panel['query'], **deadline).json()["Data"])
+
+                return {
+                    "meta": {
+                        "schema": res["meta"]
+                    },
+                    "dataset": toDataFrame(res["data"], res["meta"])
+                }
+
+            meta = {}
+            response = panel['statwolf'].post(url, panel['query'], stream=True, **deadline)
+            batches = rows(response.iterContent(), ['Data', 'data'], batchSize)
+
+            # chunks are typed as they are yielded, so only replies carrying meta before data get typed chunks
+            def chunks():
+                try:
+                    for b in batches:
+                        meta["schema"] = batches.envelope.get("Data", {}).get("meta", None)
+                        yield toDataFrame(b, meta["schema"], categorical=False)
+
+                    meta["schema"] = check(batches.envelope.get("Data", False))["meta"]
+                finally:
+                    if hasattr(response, 'close'):
+                        response.close()
+
+            if chunkSize != None:
+                return {
+                    "meta": meta,
+                    "chunks": chunks()
+                }
+
+            frames = list(chunks())
 
             return {
-                "meta": {
-                    "schema": res["meta"]
-                },
-                "dataset": pandas.DataFrame(res["data"])
+                "meta": meta,
+                "dataset": retype(pandas.concat(frames, ignore_index=True), meta["schema"]) if len(frames) > 0 else pandas.DataFrame([])
             }
 
-        self.transform(loader, {
+        params = {
             'baseUrl': baseUrl
-        })
+        }
+
+        if batchSize != None:
+            params['batchSize'] = batchSize
+
+        self.transform(loader, params)
+
+    def transform(self, handler, params={}, chunked=False):
+        return self._append(handler, params, { "chunked": True } if chunked else {})
+
+    def reduce(self, handler, params={}):
+        return self._append(handler, params, { "reduce": True })
+
+    def _append(self, handler, params, flags):
+        from dill.source import getsource
 
-    def transform(self, handler, params={}):
         source = dedent(getsource(handler))
         source = source + 'panel["newElement"] = ' + handler.__name__ + '(element, panel)\n';
 
-        self._pipeline.append({
+        params = json.dumps(params)
+
+        step = {
+            'name': handler.__name__,
             'source': source,
-            'params': json.dumps(params)
-        })
+            'params': params,
+            'code': compile(source, '<step ' + handler.__name__ + '>', 'exec'),
+            'arguments': json.loads(params),
+            'digest': hashlib.sha1((source + params + json.dumps(flags, sort_keys=True)).encode('utf-8')).hexdigest()
+        }
+        step.update(flags)
+
+        self._pipeline.append(step)
 
         return self
 
-    def build(self):
-        return Pipeline(self._query, self._pipeline, self._context)
+    def build(self, cache=False):
+        if cache == True:
+            cache = self._context.steps
+
+        return Pipeline(self._query, self._pipeline, self._context, None if cache == False else cache)
 
 class ModelBuilder:
     def __init__(self):
@@ -267,18 +488,22 @@ class PipelineBuilder(FluentQueryEditor):
 
         self._baseUrl = baseUrl
 
-    def update(self):
+    def update(self, deadline=None):
+        deadline = deadlines.create(deadline)
+
         reply = self.post(self._baseUrl + '/getDatasetInformation', {
             "table": self._params["table"]
-        });
+        }, deadline);
 
-        updates = {};
+        current = {};
 
         for field in reply.get("fields", []):
-            updates[field["field"]] = field
+            current[field["field"]] = field
+
+        local = {}
 
         for key, value in self._params["testing"]["calculated"].items():
-            updates[key] = {
+            local[key] = {
                 "data_type": "String",
                 "field": key,
                 "is_dimension": True,
@@ -298,7 +523,7 @@ class PipelineBuilder(FluentQueryEditor):
             else:
                 continue
 
-            updates[key] = {
+            local[key] = {
                 "data_type": "Float64",
                 "field": key,
                 "is_dimension": False,
@@ -308,54 +533,152 @@ class PipelineBuilder(FluentQueryEditor):
                 "definition": metric
             }
 
-        reply = self.post(self._baseUrl + '/setDatasetInformation', {
-            "table": self._params["table"],
-            "payload": {
-                "options": {},
-                "fields": list(updates.values())
-            }
-        });
+        updates = dict(current)
+        updates.update(local)
+
+        if any(_changed(current.get(key, None), value) for key, value in local.items()):
+            reply = self.post(self._baseUrl + '/setDatasetInformation', {
+                "table": self._params["table"],
+                "payload": {
+                    "options": {},
+                    "fields": list(updates.values())
+                }
+            }, deadline);
+
+            self._context.schemas.invalidate(self._params["table"])
+            self._context.hints.invalidate(self._params["table"])
 
         return DatasourceInstance(self._params["table"], self._context)
 
-    def steps(self):
-        return StepBuilder(self._baseUrl, self._params, self._context)
+    def steps(self, batchSize=None):
+        return StepBuilder(self._baseUrl, self._params, self._context, batchSize)
+
+def _changed(current, field):
+    definition = field.get("definition", None)
+
+    if not isinstance(current, dict) or (isinstance(definition, dict) and definition.get("rebuild", False) == True):
+        return True
+
+    return any(current.get(key, None) != value for key, value in field.items())
 
 class DatasourceInstance(BaseService):
-    def __init__(self, sourceid, context):
+    def __init__(self, sourceid, context, deadline=None):
         super(DatasourceInstance, self).__init__(context)
 
         self._baseUrl = context.toDashboard('/v1/full')
         self._sourceid = sourceid;
-        self._meta = self.post(self._baseUrl + '/getSchema', {
-            "sourceid": sourceid
-        })
+        self._deadline = deadlines.create(deadline)
+        self._meta = None
+        self._views = None
+        self._lock = threading.Lock()
 
     def builder(self):
         return PipelineBuilder(self._sourceid, self._baseUrl, self._context)
 
+    def prefetch(self, deadline=None):
+        self._load(deadlines.create(deadline) if deadline != None else self._deadline)
+
+        return self
+
     def schema(self):
-        return self._meta.get("schema", {})
+        return self.raw().get("schema", {})
 
     def dimensions(self):
-        return self._wrap(self._meta.get("dimensions", []))
+        return self._view("dimensions")[0]
 
     def metrics(self):
-        return self._wrap(self._meta.get("metrics", []))
+        return self._view("metrics")[0]
 
     def filters(self):
-        return self._wrap(self._meta.get("filters", []))
+        return self._view("filters")[0]
+
+    def dimension(self, name):
+        return self._view("dimensions")[1].get(name, None)
+
+    def metric(self, name):
+        return self._view("metrics")[1].get(name, None)
 
     def filter(self, name):
-        items = self._wrap([ f for f in self._meta.get("filters", []) if f == name ])
-        return items[0] if len(items) == 1 else None
+        return self._view("filters")[1].get(name, None)
 
     def raw(self):
-        return self._meta
+        return self._load(self._deadline)
+
+    def prefetchValues(self, fields=None, hint=None, concurrency=parallel.DEFAULT_CONCURRENCY, deadline=None):
+        deadline = deadlines.create(deadline)
+        fields = self.filters() if fields == None else [ f if hasattr(f, 'name') else Field(self._sourceid, f, self._hint) for f in fields ]
+        values = parallel.run(lambda f: f.values(hint, deadline), fields, concurrency)
+
+        return { f.name(): v for f, v in zip(fields, values) }
+
+    def _load(self, deadline):
+        with self._lock:
+            if self._meta == None:
+                self._meta = self._fetch(deadline)
+
+            return self._meta
+
+    def _view(self, kind):
+        meta = self.raw()
+
+        with self._lock:
+            if self._views == None:
+                self._views = { k: self._index(meta.get(k, [])) for k in [ "dimensions", "metrics", "filters" ] }
+
+            return self._views[kind]
+
+    def _index(self, names):
+        getHint = self._hint
+        fields = [ Field(self._sourceid, n, getHint) for n in names ]
+        index = {}
+
+        for f in fields:
+            index.setdefault(f.name(), f)
+
+        return fields, index
+
+    def _fetch(self, deadline):
+        schemas = self._context.schemas
+        entry = schemas.entry(self._sourceid)
+
+        if entry != None and schemas.isFresh(entry):
+            return entry.value
+
+        options = deadlines.options(deadline)
+
+        if entry != None and entry.tag != None:
+            options["headers"] = { "If-None-Match": entry.tag }
+
+        response = self._context.http.post(self._baseUrl + '/getSchema', {
+            "sourceid": self._sourceid
+        }, **options)
+
+        if entry != None and response.status_code == 304:
+            schemas.touch(self._sourceid)
+            return entry.value
+
+        meta = response.json()["Data"]
+
+        if not isinstance(meta, dict):
+            return meta
+
+        digest = hashlib.sha1(json.dumps(meta, sort_keys=True).encode('utf-8')).hexdigest()
+
+        if entry != None and entry.digest == digest:
+            meta = entry.value
+
+        return schemas.set(self._sourceid, meta, response.headers.get("ETag", None), digest)
+
+    def _hint(self, params, deadline=None):
+        hints = self._context.hints
+        values = hints.lookup(self._sourceid, params["field"], params.get("text", None))
 
-    def _wrap(self, items):
-        l = lambda payload: self.post(self._baseUrl + '/getHints', payload)
-        return list(map(lambda i: Field(self._sourceid, i, l), items))
+        if values != None:
+            return values
+
+        values = self.post(self._baseUrl + '/getHints', params, deadline)
+
+        return hints.store(self._sourceid, params["field"], params.get("text", None), values)
 
 class UploaderPanel:
     def __init__(self, tmpFile, parser):
@@ -390,7 +713,8 @@ class Blob(BaseService):
         self._source = source
         self._panel = UploaderPanel(context.tempFile(), parser)
 
-    def upload(self):
+    def upload(self, deadline=None):
+        deadline = deadlines.create(deadline)
         watchdog = 0
 
         while self._source(self._panel) is not False:
@@ -404,9 +728,17 @@ class Blob(BaseService):
 
         location = self._panel.close()
         filename = basename(location)
-        blob, baseUrl = self._context.blob()
+        blob, baseUrl = self._context.blob(deadline)
+
+        try:
+            self._store(blob, filename, location, deadline)
+        except Exception as e:
+            if getattr(e, 'status_code', None) not in AUTH_ERRORS:
+                raise
+
+            blob, baseUrl = self._context.blob(deadline, refresh=True)
+            self._store(blob, filename, location, deadline)
 
-        blob.create_blob_from_path('uploads', filename, location)
         blobUrl = baseUrl + 'uploads/' + filename
 
         commandPath = self._context.toDashboard('/v1/datasetimport/manageDatasetCreation')
@@ -423,15 +755,25 @@ class Blob(BaseService):
                         "path": blobUrl
                     }
                 }
-            })
+            }, deadline)
 
             if 'Code' in context:
                 raise StatwolfException(context['Message'])
 
+            self._context.schemas.invalidate(self._sourceid)
+            self._context.hints.invalidate(self._sourceid)
+            self._context.catalogue.invalidate(CATALOGUE)
+
             return DatasourceInstance(self._sourceid, self._context)
         finally:
             self._panel.remove()
 
+    def _store(self, blob, filename, location, deadline):
+        if deadline == None:
+            blob.create_blob_from_path('uploads', filename, location)
+        else:
+            blob.create_blob_from_path('uploads', filename, location, timeout=max(1, int(deadline.check().remaining())))
+
 class Parser(BaseService):
     def __init__(self, sourceid, label, source, context):
         super(Parser, self).__init__(context)
@@ -470,28 +812,116 @@ class Upload(BaseService):
     def source(self, handler):
         return Parser(self._sourceid, self._label, handler, self._context)
 
+class Catalogue:
+    def __init__(self, entries):
+        self._lock = threading.Lock()
+        self._build(entries)
+
+    def entries(self):
+        return self._entries
+
+    def ids(self):
+        return list(self._index.keys())
+
+    def get(self, sourceid):
+        return self._index.get(sourceid, None)
+
+    def exists(self, sourceid):
+        return sourceid in self._index
+
+    def filter(self, provider=None, label=None):
+        return [ e for e in self._entries if isinstance(e, dict)
+            and (provider == None or e.get("provider", None) == provider)
+            and (label == None or e.get("label", None) == label) ]
+
+    def discard(self, sourceid):
+        with self._lock:
+            self._build([ e for e in self._entries if _sourceid(e) != sourceid ])
+
+    def _build(self, entries):
+        self._entries = entries
+        self._index = { _sourceid(e): e for e in entries }
+
+    def __contains__(self, sourceid):
+        return self.exists(sourceid)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+def _sourceid(entry):
+    if not isinstance(entry, dict):
+        return entry
+
+    for key in SOURCEID_KEYS:
+        if key in entry:
+            return entry[key]
+
+    return None
+
 class Datasource(BaseService):
     def __init__(self, context):
         super(Datasource, self).__init__(context)
 
-    def list(self):
-        return self.post(self._context.toDashboard('/v1/full/listSchemas'), {})
+    def list(self, deadline=None):
+        return self._refresh(deadline)[0]
+
+    def catalogue(self, refresh=False, deadline=None):
+        catalogue = None if refresh else self._context.catalogue.get(CATALOGUE)
+
+        return catalogue if catalogue != None else self._refresh(deadline)[1]
 
-    def explore(self, sourceid):
-        return DatasourceInstance(sourceid, self._context)
+    def exists(self, sourceid, deadline=None):
+        return self.catalogue(deadline=deadline).exists(sourceid)
+
+    def explore(self, sourceid, deadline=None):
+        return DatasourceInstance(sourceid, self._context, deadline)
+
+    def exploreMany(self, sourceids, concurrency=parallel.DEFAULT_CONCURRENCY, deadline=None):
+        deadline = deadlines.create(deadline)
+
+        return parallel.bulk(lambda s: DatasourceInstance(s, self._context, deadline).prefetch(), sourceids, concurrency)
 
     def upload(self, sourceid, label):
         return Upload(sourceid, label, self._context)
 
-    def delete(self, sourceid):
+    def delete(self, sourceid, deadline=None):
         self.post(self._context.toDashboard('/v1/datasetimport/manageDatasetCreation'), {
             "command":"deleteDataset",
             "context": {
                 "datasetid": sourceid
             }
-        })
+        }, deadline)
+
+        self._context.schemas.invalidate(sourceid)
+        self._context.hints.invalidate(sourceid)
+
+        catalogue = self._context.catalogue.get(CATALOGUE)
+
+        if catalogue != None:
+            catalogue.discard(sourceid)
 
         return self
 
+    def deleteMany(self, sourceids, concurrency=parallel.DEFAULT_CONCURRENCY, deadline=None):
+        deadline = deadlines.create(deadline)
+
+        def remove(sourceid):
+            self.delete(sourceid, deadline)
+
+            return True
+
+        return parallel.bulk(remove, sourceids, concurrency)
+
+    def _refresh(self, deadline):
+        entries = self.post(self._context.toDashboard('/v1/full/listSchemas'), {}, deadline)
+
+        if not isinstance(entries, list):
+            return entries, Catalogue([])
+
+        return entries, self._context.catalogue.set(CATALOGUE, Catalogue(entries))
+
 def create(context):
     return Datasource(context)
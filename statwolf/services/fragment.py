@@ -1,5 +1,6 @@
 from statwolf.services.baseservice import BaseService
 from statwolf.services.datasource import create as createDatasource
+from statwolf import deadline as deadlines
 
 class FragmentInstance:
     def __init__(self, fragmentId, context, datasource):
@@ -57,44 +58,49 @@ class FragmentInstance:
         for f in filterList:
             self.addFilter(f[0], f[1], f[2])
 
-    def params(self):
-        response = self._discover()
+    def params(self, deadline=None):
+        response = self._discover(deadline)
 
         params = { key: response[0][key] for key in ["filter", "timeframe", "metrics", "dimensions", "take"] }
         params.update(self._params)
 
         return params
 
-    def create(self):
-        response = self._req("extend")
+    def create(self, deadline=None):
+        response = self._req("extend", deadline)
 
         return create(self._context).explore(response[0]["fragmentId"])
 
-    def link(self):
-        return self.create()._baseUrl;
+    def link(self, deadline=None):
+        return self.create(deadline)._baseUrl;
 
-    def data(self):
-        response = self._req("query")
+    def data(self, deadline=None):
+        response = self._req("query", deadline)
 
         return response[0]["data"]["data"]
 
-    def currentDatasource(self):
-        params = self._discover()[0]
-        return self._datasource.explore(params["table"])
+    def currentDatasource(self, deadline=None):
+        deadline = deadlines.create(deadline)
+        params = self._discover(deadline)[0]
+        return self._datasource.explore(params["table"], **deadlines.options(deadline))
 
-    def _req(self, mode):
-        return self._context.http.post(self._baseUrl, { "mode": mode, "params": self._params }).json()
+    def _req(self, mode, deadline=None):
+        return self._context.http.post(self._baseUrl, { "mode": mode, "params": self._params }, **deadlines.options(deadline)).json()
 
-    def _discover(self):
-        return self._context.http.get(self._baseUrl + '/discover').json()
+    def _discover(self, deadline=None):
+        return self._context.http.get(self._baseUrl + '/discover', **deadlines.options(deadline)).json()
 
 class Fragment(BaseService):
     def __init__(self, context, datasourceFactory):
         super(Fragment, self).__init__(context)
         self._datasourceFactory = datasourceFactory
+        self._datasource = None
 
     def explore(self, fragmentId):
-        return FragmentInstance(fragmentId, self._context, self._datasourceFactory(self._context))
+        if self._datasource == None:
+            self._datasource = self._datasourceFactory(self._context)
+
+        return FragmentInstance(fragmentId, self._context, self._datasource)
 
 def create(context):
     return Fragment(context, createDatasource)
@@ -1,5 +1,8 @@
 from statwolf.services.baseservice import BaseService
 from statwolf import StatwolfException
+from statwolf import stream as streams
+from statwolf.deadline import options
+from statwolf.frames import toDataFrame
 from copy import deepcopy
 
 import json
@@ -17,17 +20,40 @@ class SQL(BaseService):
             }
         }
 
-    def query(self, statement):
+    def query(self, statement, deadline=None):
+        res = self.post(self._baseUrl, self._params(statement), deadline)
+
+        self._check(res)
+
+        return { key: res['data'][key] for key in ['data', 'meta'] }
+
+    def stream(self, statement, batchSize=streams.DEFAULT_BATCH_SIZE, frames=False, deadline=None):
+        response = self._context.http.post(self._baseUrl, self._params(statement), stream=True, **options(deadline))
+        rows = streams.rows(response.iterContent(), ['Data', 'data', 'data'], batchSize)
+
+        for batch in rows:
+            yield toDataFrame(batch, self._meta(rows), categorical=False) if frames else batch
+
+        res = rows.envelope.get('Data', False)
+
+        if res == False:
+            raise StatwolfException('Invalid request: maybe an authentication error. Please check that host, username and password are correct')
+
+        self._check(res)
+
+    def _meta(self, rows):
+        return rows.envelope.get('Data', {}).get('data', {}).get('meta', None)
+
+    def _params(self, statement):
         params = deepcopy(self._baseParams)
         params['query']['statement_clickhouse'] = statement
 
-        res = self.post(self._baseUrl, params)
+        return params
 
+    def _check(self, res):
         if 'Code' in res:
             error = json.loads(res['Message'].replace('Error: ', ''))
             raise StatwolfException(json.loads(error['response'])['message'])
 
-        return { key: res['data'][key] for key in ['data', 'meta'] }
-
 def create(context):
     return SQL(context)
@@ -6,18 +6,18 @@ class StatwolfML(BaseService):
 
         self._basePath = '/v1/statwolfml'
 
-    def preprocess(self, config):
+    def preprocess(self, config, deadline=None):
         path = self._basePath + '/preprocess'
 
-        return self.post(path, config)
+        return self.post(path, config, deadline)
 
-    def apply(self, model, config):
+    def apply(self, model, config, deadline=None):
         path = self._basePath + '/apply'
 
         return self.post(path, {
             "model": model,
             "config": config
-        })
+        }, deadline)
 
 
 def create(context):
@@ -3,7 +3,8 @@ from unittest.mock import MagicMock, call
 
 from statwolf.services import datasource
 from statwolf.services.datasource import Datasource, DatasourceInstance, Upload, Parser, Blob, UploaderPanel, PipelineBuilder, StepBuilder, Pipeline, FluentQueryEditor
-from statwolf import StatwolfException
+from statwolf import StatwolfException, DeadlineExceededException
+from statwolf.deadline import Deadline
 
 import pandas
 from pandas.util.testing import assert_frame_equal
@@ -13,6 +14,9 @@ from statwolf.mocks import ContextMock, ResponseMock, FileMock
 from copy import deepcopy
 
 import json
+import threading
+import types
+import unittest.mock
 
 class DatasourceFactoryTestCase(TestCase):
 
@@ -56,14 +60,160 @@ class DatasourceInstanceTestCase(TestCase):
         self.assertEqual(the_list, mock_list)
         self.context.http.post.assert_called_with('/root/v1/full/listSchemas', {})
 
-    def test_itShouldLoadMetadataOnCreation(self):
+    def test_itShouldCacheTheCatalogue(self):
+        entries = [
+            { "sourceid": "a", "label": "A", "provider": "RemoteFile" },
+            { "sourceid": "b", "label": "B", "provider": "GoogleAnalytics" },
+            "c"
+        ]
+        self.context.http.post = MagicMock(return_value=ResponseMock({ "Success": True, "Data": entries }))
+        d = datasource.create(self.context)
+
+        catalogue = d.catalogue()
+
+        self.assertIs(d.catalogue(), catalogue)
+        self.assertTrue(d.exists("a"))
+        self.assertTrue("c" in catalogue)
+        self.assertFalse(catalogue.exists("d"))
+        self.assertEqual(catalogue.get("b"), entries[1])
+        self.assertEqual(catalogue.ids(), [ "a", "b", "c" ])
+        self.assertEqual(catalogue.filter(provider="RemoteFile"), [ entries[0] ])
+        self.assertEqual(catalogue.filter(label="B"), [ entries[1] ])
+        self.assertEqual(len(catalogue), 3)
+        self.context.http.post.assert_called_once_with('/root/v1/full/listSchemas', {})
+
+        d.catalogue(refresh=True)
+        self.assertEqual(self.context.http.post.call_count, 2)
+
+    def test_itShouldExpireTheCatalogue(self):
+        self.now = 0
+        self.context.catalogue.clock = lambda: self.now
+        self.context.http.post = MagicMock(return_value=ResponseMock({ "Success": True, "Data": [ "a" ] }))
+        d = datasource.create(self.context)
+
+        d.catalogue()
+        self.now = 1000
+        d.catalogue()
+
+        self.assertEqual(self.context.http.post.call_count, 2)
+
+    def test_itShouldDropDeletedSourcesFromTheCatalogue(self):
+        self.context.http.post = MagicMock(return_value=ResponseMock({ "Success": True, "Data": [ "a", "b" ] }))
+        d = datasource.create(self.context)
+        catalogue = d.catalogue()
+
+        d.delete("a")
+
+        self.assertFalse(catalogue.exists("a"))
+        self.assertIs(d.catalogue(), catalogue)
+        self.assertEqual(catalogue.entries(), [ "b" ])
+
+    def test_itShouldExploreManySources(self):
+        def reply(path, body, **kwargs):
+            if body["sourceid"] == "broken":
+                raise StatwolfException('boom')
+
+            return ResponseMock({ "Success": True, "Data": { "schema": body["sourceid"] } })
+
+        self.context.http.post = MagicMock(side_effect=reply)
+
+        result = datasource.create(self.context).exploreMany([ "a", "broken", "b" ], concurrency=3)
+
+        self.assertEqual(result.results["a"].schema(), "a")
+        self.assertEqual(result.results["b"].schema(), "b")
+        self.assertEqual(list(result.errors.keys()), [ "broken" ])
+        self.assertEqual(self.context.http.post.call_count, 3)
+
+    def test_itShouldDeleteManySources(self):
+        def reply(path, body, **kwargs):
+            if body["context"]["datasetid"] == "broken":
+                raise StatwolfException('boom')
+
+            return ResponseMock({ "Success": True, "Data": {} })
+
+        self.context.http.post = MagicMock(side_effect=reply)
+
+        result = datasource.create(self.context).deleteMany([ "a", "broken", "b" ], concurrency=2)
+
+        self.assertEqual(result.results, { "a": True, "b": True })
+        self.assertIsInstance(result.errors["broken"], StatwolfException)
+        self.assertFalse(result.ok())
+
+    def test_itShouldLoadMetadataLazily(self):
         d = datasource.create(self.context)
         instance = d.explore('mock source')
 
-        self.context.http.post.assert_called_with('/root/v1/full/getSchema', {
+        self.context.http.post.assert_not_called()
+
+        self.assertEqual(instance.raw(), self.response.json()["Data"])
+        instance.schema()
+        instance.filters()
+
+        self.context.http.post.assert_called_once_with('/root/v1/full/getSchema', {
             "sourceid": "mock source"
         })
-        self.assertEqual(instance._meta, self.response.json()["Data"])
+
+    def test_itShouldPrefetchTheMetadata(self):
+        d = datasource.create(self.context)
+        instance = d.explore('mock source').prefetch(10)
+
+        args, kwargs = self.context.http.post.call_args
+        self.assertEqual(args, ('/root/v1/full/getSchema', { "sourceid": "mock source" }))
+        self.assertAlmostEqual(kwargs["deadline"].remaining(), 10, delta=1)
+        self.assertEqual(instance.raw(), self.data)
+        self.assertEqual(self.context.http.post.call_count, 1)
+
+    def test_itShouldCacheTheSchema(self):
+        d = datasource.create(self.context)
+        first = d.explore('mock source').prefetch()
+        second = d.explore('mock source').prefetch()
+        d.explore('other source').prefetch()
+
+        self.assertEqual(self.context.http.post.call_count, 2)
+        self.assertIs(first.raw(), second.raw())
+
+    def test_itShouldRevalidateExpiredSchemasWithTheETag(self):
+        self.now = 0
+        self.context.schemas.clock = lambda: self.now
+        self.response.headers = { "ETag": '"v1"' }
+
+        d = datasource.create(self.context)
+        first = d.explore('mock source').prefetch()
+
+        notModified = ResponseMock(None)
+        notModified.status_code = 304
+        self.context.http.post = MagicMock(return_value=notModified)
+        self.now = 1000
+
+        second = d.explore('mock source').prefetch()
+
+        self.context.http.post.assert_called_with('/root/v1/full/getSchema', { "sourceid": "mock source" }, headers={ "If-None-Match": '"v1"' })
+        self.assertIs(second.raw(), first.raw())
+        self.assertEqual(self.context.schemas.get('mock source'), self.data)
+
+    def test_itShouldKeepUnchangedSchemasOnRevalidation(self):
+        self.now = 0
+        self.context.schemas.clock = lambda: self.now
+
+        d = datasource.create(self.context)
+        first = d.explore('mock source').prefetch()
+
+        self.context.http.post = MagicMock(return_value=ResponseMock({ "Data": deepcopy(self.data) }))
+        self.now = 1000
+        self.assertIs(d.explore('mock source').raw(), first.raw())
+
+        changed = dict(self.data, schema={ "field": "a new schema" })
+        self.context.http.post = MagicMock(return_value=ResponseMock({ "Data": changed }))
+        self.now = 2000
+        self.assertEqual(d.explore('mock source').schema(), { "field": "a new schema" })
+
+    def test_itShouldInvalidateTheSchemaOnDelete(self):
+        d = datasource.create(self.context)
+        d.explore('mock source').prefetch()
+
+        d.delete('mock source')
+
+        self.assertIsNone(self.context.schemas.entry('mock source'))
 
     def test_itShouldReturnTheMetaFields(self):
         d = datasource.create(self.context)
@@ -77,6 +227,19 @@ class DatasourceInstanceTestCase(TestCase):
         self.assertEqual(instance.filter("invalid"), None)
         self.assertEqual(instance.raw(), self.data)
 
+    def test_itShouldIndexTheMetaFields(self):
+        self.data["dimensions"] = [ "country", "city" ]
+        instance = datasource.create(self.context).explore('mock source')
+
+        self.assertIs(instance.dimensions(), instance.dimensions())
+        self.assertIs(instance.dimension("city"), instance.dimensions()[1])
+        self.assertIs(instance.metric("the metrics"), instance.metrics()[0])
+        self.assertIs(instance.filter("the filters"), instance.filters()[0])
+        self.assertEqual(instance.dimension("the filters"), None)
+        self.assertEqual(instance.metric("invalid"), None)
+        self.assertFalse(hasattr(instance.dimension("city"), '__dict__'))
+        self.context.http.post.assert_called_once()
+
     def test_itShouldGetHintsForAField(self):
         d = datasource.create(self.context)
         instance = d.explore('mock source')
@@ -99,6 +262,53 @@ class DatasourceInstanceTestCase(TestCase):
 
         self.assertEqual(res, data["Data"])
 
+    def test_itShouldCacheTheHints(self):
+        self.context.hints.limit = 10
+        d = datasource.create(self.context)
+        f = d.explore('mock source').filters()[0]
+
+        self.context.http.post = MagicMock(return_value=ResponseMock({ "Success": True, "Data": [ "test", "tested", "other test" ] }))
+
+        self.assertEqual(f.values("te"), [ "test", "tested", "other test" ])
+        self.assertEqual(f.values("te"), [ "test", "tested", "other test" ])
+        self.assertEqual(f.values("test"), [ "test", "tested", "other test" ])
+        self.assertEqual(f.values("teste"), [ "tested" ])
+
+        self.context.http.post.assert_called_once_with("/root/v1/full/getHints", {
+            "field": "the filters",
+            "text": "te",
+            "table": "mock source"
+        })
+        self.assertEqual(self.context.hints.stats()["hits"], 1)
+        self.assertEqual(self.context.hints.stats()["narrowed"], 2)
+
+    def test_itShouldPrefetchTheValuesOfEveryFilter(self):
+        self.data["filters"] = [ "country", "city" ]
+        instance = datasource.create(self.context).explore('mock source').prefetch()
+
+        def reply(path, body, **kwargs):
+            return ResponseMock({ "Success": True, "Data": [ body["field"] + " " + body["text"] ] })
+
+        self.context.http.post = MagicMock(side_effect=reply)
+
+        self.assertEqual(instance.prefetchValues(hint="a", concurrency=2), { "country": [ "country a" ], "city": [ "city a" ] })
+        self.assertEqual(instance.prefetchValues([ "region" ], "b"), { "region": [ "region b" ] })
+        self.assertEqual(self.context.http.post.call_count, 3)
+
+    def test_prefetchValuesShouldRaiseOnError(self):
+        instance = datasource.create(self.context).explore('mock source').prefetch()
+        self.context.http.post = MagicMock(side_effect=StatwolfException('boom'))
+
+        with self.assertRaises(StatwolfException):
+            instance.prefetchValues()
+
+    def test_itShouldInvalidateTheHintsOnDelete(self):
+        self.context.hints.store('mock source', 'the filters', 'a', [ 'a' ])
+
+        datasource.create(self.context).delete('mock source')
+
+        self.assertIsNone(self.context.hints.lookup('mock source', 'the filters', 'a'))
+
     def test_itShouldCreateAnUploadObject(self):
         d = Datasource(self.context)
         u = d.upload('sourceid', 'label')
@@ -210,6 +420,7 @@ class DatasourceInstanceTestCase(TestCase):
 
         self.assertIsInstance(ds, DatasourceInstance)
         self.assertEqual(ds._sourceid, 'yolo')
+        self.assertIsNone(self.context.catalogue.entry('catalogue'))
 
     def test_itExceptOnError(self):
         source = MagicMock(side_effect=[ None, 0, 'text', True, False, 'not call' ])
@@ -415,6 +626,326 @@ class DatasourceInstanceTestCase(TestCase):
 
         self.context.http.post.assert_called_with('base url/debugQuery', params)
 
+    def test_stepBuilderShouldCompileEachStepOnce(self):
+        p = StepBuilder('base url', {}, self.context)
+
+        def increment(element, panel):
+            return element + panel['params']['step']
+
+        p.transform(increment, { "step": 2 })
+        step = p._pipeline[1]
+        pipeline = Pipeline({}, [ step, step ], self.context)
+
+        self.assertIsInstance(step['code'], types.CodeType)
+        self.assertEqual(step['code'].co_filename, '<step increment>')
+        self.assertEqual(step['arguments'], { "step": 2 })
+        self.assertEqual(step['params'], '{"step": 2}')
+
+        with unittest.mock.patch('json.loads') as loads:
+            pipeline._pipeline = [ dict(step, code=compile('panel["newElement"] = 1\n', 'first', 'exec')), step, step ]
+            self.assertEqual(pipeline.execute(), 5)
+            loads.assert_not_called()
+
+    def test_pipelineShouldGiveEachRunItsOwnParams(self):
+        def consume(element, panel):
+            return panel['params'].pop('items')
+
+        p = StepBuilder('base url', {}, self.context).transform(consume, { "items": [ 1, 2 ] })
+        pipeline = Pipeline({}, p._pipeline[1:], self.context)
+
+        self.assertEqual(pipeline.execute(), [ 1, 2 ])
+        self.assertEqual(pipeline.execute(), [ 1, 2 ])
+
+    def test_pipelineShouldResumeFromTheDeepestCachedStep(self):
+        calls = []
+        self.context.http.post = MagicMock(return_value=ResponseMock({ "Success": True, "Data": {
+            "meta": [], "data": [{ "a": 1 }], "hasErrors": False
+        }}))
+
+        def first(element, panel):
+            element["meta"]["first"] = panel["params"]["value"]
+            return element
+
+        def second(element, panel):
+            element["meta"]["second"] = element["meta"]["first"] * 2
+            return element
+
+        def build(value):
+            return StepBuilder('base url', { "table": "t" }, self.context).transform(first, { "value": value }).transform(second).build(cache=True)
+
+        res = build(1).execute()
+        res["meta"]["first"] = 'mutated'
+        res = build(1).execute()
+
+        self.assertEqual(res["meta"], { "schema": [], "first": 1, "second": 2 })
+        self.assertEqual(self.context.http.post.call_count, 1)
+
+        res = build(5).execute()
+
+        self.assertEqual(res["meta"], { "schema": [], "first": 5, "second": 10 })
+        self.assertEqual(self.context.http.post.call_count, 1)
+
+        pipeline = build(5)
+        pipeline.execute(pipeline.query().take("10"))
+
+        self.assertEqual(self.context.http.post.call_count, 2)
+
+    def test_pipelineShouldNotCacheByDefault(self):
+        self.context.http.post = MagicMock(return_value=ResponseMock({ "Success": True, "Data": {
+            "meta": [], "data": [], "hasErrors": False
+        }}))
+        pipeline = StepBuilder('base url', {}, self.context).build()
+
+        pipeline.execute()
+        pipeline.execute()
+
+        self.assertEqual(self.context.http.post.call_count, 2)
+        self.assertEqual(len(self.context.steps), 0)
+
+    def test_pipelineShouldExecuteManyOverridesConcurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        def reply(path, body, **kwargs):
+            barrier.wait()
+
+            return ResponseMock({ "Success": True, "Data": { "meta": [], "data": [{ "take": body["take"] }], "hasErrors": False } })
+
+        self.context.http.post = MagicMock(side_effect=reply)
+        pipeline = StepBuilder('base url', { "take": "1" }, self.context).build()
+        overrides = [ pipeline.query().take("2"), None, pipeline.query().take("3") ]
+
+        res = pipeline.executeMany(overrides, concurrency=3)
+
+        self.assertEqual([ r["dataset"]["take"][0] for r in res ], [ "2", "1", "3" ])
+
+    def test_executeManyShouldRaiseTheFirstError(self):
+        self.context.http.post = MagicMock(return_value=ResponseMock({ "Success": True, "Data": False }))
+        pipeline = StepBuilder('base url', {}, self.context).build()
+
+        with self.assertRaises(StatwolfException):
+            pipeline.executeMany([ None, None ])
+
+    def test_loaderShouldStreamTheDatasetInBatches(self):
+        reply = ResponseMock({
+            "Success": True,
+            "Data": {
+                "meta": [{ "name": "a", "type": "String" }],
+                "data": [ { "a": str(i) } for i in range(5) ],
+                "hasErrors": False
+            }
+        })
+        self.context.http.post = MagicMock(return_value=reply)
+
+        pb = PipelineBuilder('sourceid', 'base url', self.context)
+        res = pb.steps(batchSize=2).build().execute()
+
+        self.context.http.post.assert_called_with('base url/debugQuery', pb._params, stream=True)
+        self.assertEqual(res['meta'], { "schema": [{ "name": "a", "type": "String" }] })
+        assert_frame_equal(res['dataset'], pandas.DataFrame([ { "a": str(i) } for i in range(5) ]))
+
+    def test_loaderShouldTypeTheDatasetFromTheMeta(self):
+        reply = ResponseMock({
+            "Success": True,
+            "Data": {
+                "meta": [{ "name": "country", "type": "String" }, { "name": "sessions", "type": "UInt64" }],
+                "data": [ { "country": "Italy" if i < 3 else "Spain", "sessions": str(i) } for i in range(6) ],
+                "hasErrors": False
+            }
+        })
+        self.context.http.post = MagicMock(return_value=reply)
+
+        for batchSize in [ None, 4 ]:
+            res = StepBuilder('base url', {}, self.context, batchSize).build().execute()
+
+            self.assertEqual(str(res['dataset']['country'].dtype), 'category')
+            self.assertEqual(list(res['dataset']['sessions']), list(range(6)))
+
+    def test_loaderShouldTypeTheDatasetWhenMetaFollowsData(self):
+        self.context.http.post = MagicMock(return_value=ResponseMock({
+            "Data": {
+                "data": [ { "country": "Italy" if i < 3 else "Spain", "sessions": str(i) } for i in range(6) ],
+                "meta": [{ "name": "country", "type": "String" }, { "name": "sessions", "type": "UInt64" }],
+                "hasErrors": False
+            }
+        }))
+        pipeline = StepBuilder('base url', {}, self.context, batchSize=4).build()
+
+        for res in [ pipeline.execute(), pipeline.execute(chunkSize=4) ]:
+            self.assertEqual(str(res['dataset']['country'].dtype), 'category')
+            self.assertEqual(str(res['dataset']['sessions'].dtype), 'int64')
+            self.assertEqual(list(res['dataset']['sessions']), list(range(6)))
+
+    def _streamingReply(self):
+        self.context.http.post = MagicMock(return_value=ResponseMock({
+            "Success": True,
+            "Data": {
+                "meta": [{ "name": "n", "type": "UInt64" }],
+                "data": [ { "n": i } for i in range(5) ],
+                "hasErrors": False
+            }
+        }))
+
+    def test_pipelineShouldStreamChunksThroughChunkSafeSteps(self):
+        self._streamingReply()
+
+        def double(element, panel):
+            return { "meta": element["meta"], "dataset": element["dataset"] * panel["params"]["factor"] }
+
+        pipeline = StepBuilder('base url', {}, self.context).transform(double, { "factor": 2 }, chunked=True).build()
+        chunks = list(pipeline.stream(chunkSize=2))
+
+        self.context.http.post.assert_called_once_with('base url/debugQuery', {}, stream=True)
+        self.assertEqual([ list(c["dataset"]["n"]) for c in chunks ], [ [ 0, 2 ], [ 4, 6 ], [ 8 ] ])
+        self.assertEqual(chunks[0]["meta"], { "schema": [{ "name": "n", "type": "UInt64" }] })
+
+    def test_pipelineShouldReduceTheChunks(self):
+        self._streamingReply()
+
+        def total(element, panel):
+            return { "meta": element["meta"], "dataset": sum(int(d["n"].sum()) for d in element["dataset"]) }
+
+        def label(element, panel):
+            return { "meta": element["meta"], "dataset": 'total ' + str(element["dataset"]) }
+
+        pipeline = StepBuilder('base url', {}, self.context).reduce(total).transform(label).build()
+
+        self.assertEqual(pipeline.execute(chunkSize=2)["dataset"], 'total 10')
+        self.assertEqual(pipeline.execute()["dataset"], 'total 10')
+        self.assertEqual([ e["dataset"] for e in pipeline.stream(chunkSize=2) ], [ 'total 10' ])
+
+    def test_pipelineShouldCollectChunksBeforeWholeDatasetSteps(self):
+        self._streamingReply()
+
+        def count(element, panel):
+            return { "meta": element["meta"], "dataset": len(element["dataset"]) }
+
+        pipeline = StepBuilder('base url', {}, self.context).transform(count).build()
+
+        self.assertEqual(pipeline.execute(chunkSize=2)["dataset"], 5)
+
+        self.context.http.post.reset_mock()
+
+        with self.assertRaisesRegex(StatwolfException, 'count is not chunk-safe'):
+            pipeline.stream(chunkSize=2)
+
+        self.context.http.post.assert_not_called()
+
+    def test_chunkedExecutionShouldCategorizeLikeExecute(self):
+        self.context.http.post = MagicMock(return_value=ResponseMock({
+            "Success": True,
+            "Data": {
+                "meta": [{ "name": "country", "type": "String" }],
+                "data": [ { "country": "Italy" if i < 3 else "Spain" } for i in range(6) ],
+                "hasErrors": False
+            }
+        }))
+        pipeline = StepBuilder('base url', {}, self.context).build()
+
+        self.assertEqual(str(pipeline.execute()["dataset"]["country"].dtype), 'category')
+        self.assertEqual(str(pipeline.execute(chunkSize=2)["dataset"]["country"].dtype), 'category')
+
+    def test_streamedLoaderShouldCloseTheResponse(self):
+        self._streamingReply()
+        response = self.context.http.post.return_value
+        response.close = MagicMock()
+
+        list(StepBuilder('base url', {}, self.context).build().stream(chunkSize=2))
+        response.close.assert_called_once_with()
+
+    def test_pipelineShouldStreamToASink(self):
+        self._streamingReply()
+        sink = MagicMock()
+
+        count = StepBuilder('base url', {}, self.context).build().streamTo(sink, chunkSize=3)
+
+        self.assertEqual(count, 2)
+        self.assertEqual([ len(c[0][0]["dataset"]) for c in sink.call_args_list ], [ 3, 2 ])
+
+    def test_streamedPipelineShouldExceptIfAnErrorOccurs(self):
+        self.context.http.post = MagicMock(return_value=ResponseMock({ "Data": { "meta": [], "data": [], "hasErrors": True, "errorMessage": "The error" } }))
+
+        chunks = StepBuilder('base url', {}, self.context).build().stream(chunkSize=2)
+
+        with self.assertRaisesRegex(StatwolfException, 'The error'):
+            list(chunks)
+
+    def test_streamingLoaderShouldExceptIfAnErrorOccurs(self):
+        reply = ResponseMock({
+            "Data": {
+                "meta": [],
+                "data": [],
+                'hasErrors': True,
+                'errorMessage': "The error"
+            }
+        })
+        self.context.http.post = MagicMock(return_value=reply)
+
+        p = StepBuilder('base url', {}, self.context, batchSize=10)
+
+        self.assertRaises(StatwolfException, p.build().execute)
+
+    def test_pipelineShouldSpreadTheDeadlineAcrossSteps(self):
+        self.now = 0
+        reply = ResponseMock({
+            "Data": {
+                "meta": [],
+                "data": []
+            }
+        })
+        self.context.http.post = MagicMock(return_value=reply)
+
+        def slow(element, panel):
+            return element
+
+        p = StepBuilder('base url', {}, self.context).transform(slow).build()
+        deadline = Deadline(10, clock=lambda: self.now)
+
+        p.execute(deadline=deadline)
+        self.context.http.post.assert_called_with('base url/debugQuery', {}, deadline=deadline)
+
+        self.now = 10
+        with self.assertRaises(DeadlineExceededException):
+            p.execute(deadline=deadline)
+
+    def test_blobShouldBoundTheUploadByTheDeadline(self):
+        source = MagicMock(side_effect=[ 'text', False ])
+        blobManager, url = self.context.blob()
+        blobManager.create_blob_from_path = MagicMock()
+        self.context.tempFile().remove = MagicMock()
+        self.context.http.post = MagicMock(return_value=ResponseMock({ "Data": {} }))
+
+        deadline = Deadline(30)
+        Blob('yolo', 'label', source, MagicMock(return_value='row'), self.context).upload(deadline)
+
+        self.assertLessEqual(blobManager.create_blob_from_path.call_args[1]["timeout"], 30)
+        self.assertIs(self.context.http.post.call_args[1]["deadline"], deadline)
+
+    def test_blobShouldRefreshTheCredentialsOnAuthFailure(self):
+        class AuthError(Exception):
+            status_code = 403
+
+        source = MagicMock(side_effect=[ 'text', False ])
+        stale = MagicMock()
+        stale.create_blob_from_path = MagicMock(side_effect=AuthError())
+        fresh = MagicMock()
+        self.context.blob = MagicMock(side_effect=[ (stale, 'stale url/'), (fresh, 'fresh url/') ])
+        self.context.tempFile().remove = MagicMock()
+        self.context.http.post = MagicMock(return_value=ResponseMock({ "Data": {} }))
+
+        Blob('yolo', 'label', source, MagicMock(return_value='row'), self.context).upload()
+
+        self.context.blob.assert_has_calls([ call(None), call(None, refresh=True) ])
+        fresh.create_blob_from_path.assert_called_with('uploads', 'file_name', 'file_location/file_name')
+        self.assertEqual(self.context.http.post.call_args_list[0][0][1]["context"]["payload"]["path"], 'fresh url/uploads/file_name')
+
+    def test_blobShouldNotRetryOtherFailures(self):
+        source = MagicMock(side_effect=[ 'text', False ])
+        blobManager, url = self.context.blob()
+        blobManager.create_blob_from_path = MagicMock(side_effect=IOError())
+
+        with self.assertRaises(IOError):
+            Blob('yolo', 'label', source, MagicMock(return_value='row'), self.context).upload()
+
     def test_loaderShouldExceptIfAnErrorOccurs(self):
         reply = ResponseMock({
             "Data": {
@@ -738,8 +1269,77 @@ class DatasourceInstanceTestCase(TestCase):
                         "definition": mlDef
                     }]
                 }
-            }),
-            call('/root/v1/full/getSchema', {'sourceid': 'an id'})
+            })
         ]
 
         self.context.http.post.assert_has_calls(calls)
+
+    def test_pipelineBuilderShouldSkipUnchangedDefinitions(self):
+        pb = PipelineBuilder("an id", '/root', self.context)
+        self.context.schemas.set("an id", self.data)
+        self.context.http.post = MagicMock(return_value=ResponseMock({ "Data": {
+            "fields": [{
+                "field": "yolo"
+            }, {
+                "data_type": "Float64",
+                "field": "mySql",
+                "is_dimension": False,
+                "is_filter": False,
+                "is_visible": True,
+                "type": "metric",
+                "definition": {
+                    "type": "sql",
+                    "sql": "an sql string"
+                },
+                "id": "set by the server"
+            }]
+        }}))
+
+        instance = pb.customMetric('mySql', 'an sql string').update()
+
+        self.context.http.post.assert_called_once_with('/root/getDatasetInformation', { "table": "an id" })
+        self.assertEqual(self.context.schemas.get("an id"), self.data)
+        self.assertEqual(instance.raw(), self.data)
+
+        pb.customMetric('mySql', 'a new sql string').update()
+
+        self.assertEqual(self.context.http.post.call_args_list[-1][0][0], '/root/setDatasetInformation')
+        self.assertIsNone(self.context.schemas.entry("an id"))
+
+    def test_pipelineBuilderShouldAlwaysSendForcedTrainings(self):
+        pb = PipelineBuilder("an id", '/root', self.context)
+        pb.model('myModel', lambda b: { "my": "model" }, forceTraining=True)
+        definition = dict(pb._params["testing"]["metrics"]["myModel"])
+
+        self.context.http.post = MagicMock(return_value=ResponseMock({ "Data": {
+            "fields": [{
+                "data_type": "Float64",
+                "field": "myModel",
+                "is_dimension": False,
+                "is_filter": False,
+                "is_visible": True,
+                "type": "metric",
+                "definition": definition
+            }]
+        }}))
+
+        pb.update()
+
+        self.assertEqual(self.context.http.post.call_count, 2)
+
+    def test_pipelineBuilderShouldIgnoreServerOnlyFields(self):
+        pb = PipelineBuilder("an id", '/root', self.context)
+        self.context.http.post = MagicMock(return_value=ResponseMock({ "Data": {
+            "fields": [{
+                "field": "raw_col",
+                "definition": None
+            }, {
+                "field": "trained",
+                "type": "metric",
+                "definition": { "type": "ml", "rebuild": True }
+            }]
+        }}))
+
+        pb.update()
+
+        self.context.http.post.assert_called_once_with('/root/getDatasetInformation', { "table": "an id" })
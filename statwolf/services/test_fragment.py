@@ -5,6 +5,7 @@ from statwolf.services import fragment
 from statwolf.services.fragment import Fragment, FragmentInstance
 
 from statwolf.mocks import ContextMock, ResponseMock, DatasourceMock
+from statwolf.deadline import Deadline
 
 class FragmentFactoryTestCase(TestCase):
 
@@ -151,3 +152,25 @@ class FragmentInstanceTestCase(TestCase):
         factory.assert_called_with(context)
         dsMock.explore.assert_called_with("ga_132655703")
         self.assertEqual(d, ret)
+
+    def test_itShouldPropagateTheDeadline(self):
+        context = ContextMock()
+
+        response = ResponseMock([{ "data": { "data": [] } }])
+        context.http.post = MagicMock(return_value=response)
+
+        deadline = Deadline(5)
+        fragment.create(context).explore("an id").data(deadline)
+
+        context.http.post.assert_called_with("/fragment/an id", { "mode": "query", "params": {} }, deadline=deadline)
+
+    def test_itShouldReuseTheDatasourceService(self):
+        context = ContextMock()
+        factory = MagicMock(return_value=DatasourceMock())
+
+        f = Fragment(context, factory)
+        a = f.explore("an id")
+        b = f.explore("another id")
+
+        factory.assert_called_once_with(context)
+        self.assertIs(a._datasource, b._datasource)
@@ -7,6 +7,7 @@ from statwolf.services.sql import SQL
 from statwolf.mocks import ContextMock, ResponseMock
 
 from statwolf import StatwolfException
+from statwolf.deadline import Deadline
 
 import json
 
@@ -87,3 +88,91 @@ class SQLTestCase(TestCase):
             s.query('invalid!')
 
         self.assertRaises(StatwolfException, call)
+
+    def test_itShouldStreamRowBatches(self):
+        context = ContextMock()
+
+        rows = [ { "n": i } for i in range(5) ]
+        response = ResponseMock({
+            "Success": True,
+            "Data": {
+                "data": {
+                    "meta": [ { "name": "n", "type": "UInt64" } ],
+                    "data": rows
+                },
+                "hints": {}
+            }
+        })
+        context.http.post = MagicMock(return_value=response)
+
+        batches = list(SQL(context).stream('select n', batchSize=2))
+
+        self.assertEqual(batches, [ rows[0:2], rows[2:4], rows[4:5] ])
+        context.http.post.assert_called_with('/root/v1/freehandquery/$$base', {
+            'table': 'fhq_clickhouse_main',
+            'query': {
+                'keywords': {},
+                'statement_clickhouse': 'select n'
+            }
+        }, stream=True)
+
+    def test_itShouldStreamDataFrames(self):
+        context = ContextMock()
+
+        response = ResponseMock({
+            "Data": {
+                "data": {
+                    "meta": [],
+                    "data": [ { "n": i } for i in range(3) ]
+                }
+            }
+        })
+        context.http.post = MagicMock(return_value=response)
+
+        frames = list(SQL(context).stream('select n', batchSize=2, frames=True))
+
+        self.assertEqual([ len(f) for f in frames ], [ 2, 1 ])
+        self.assertEqual(list(frames[1]["n"]), [ 2 ])
+
+    def test_itShouldTypeStreamedDataFrames(self):
+        context = ContextMock()
+
+        response = ResponseMock({
+            "Data": {
+                "data": {
+                    "meta": [ { "name": "n", "type": "UInt64" } ],
+                    "data": [ { "n": str(i) } for i in range(3) ]
+                }
+            }
+        })
+        context.http.post = MagicMock(return_value=response)
+
+        frames = list(SQL(context).stream('select n', batchSize=2, frames=True))
+
+        self.assertEqual(list(frames[0]["n"]), [ 0, 1 ])
+
+    def test_itShouldExceptOnStreamError(self):
+        context = ContextMock()
+
+        response = ResponseMock({
+            "Success": False,
+            "Data": {
+                "Code": -1,
+                "Message": 'Error: ' + json.dumps({ 'response': json.dumps({ "message": "Error message" }) } )
+            }
+        })
+        context.http.post = MagicMock(return_value=response)
+
+        with self.assertRaises(StatwolfException):
+            list(SQL(context).stream('invalid!'))
+
+    def test_itShouldPropagateTheDeadline(self):
+        context = ContextMock()
+
+        response = ResponseMock({ "Data": { "data": { "data": [], "meta": [] } } })
+        context.http.post = MagicMock(return_value=response)
+
+        deadline = Deadline(5)
+        SQL(context).query('select 1', deadline=deadline)
+
+        self.assertIs(context.http.post.call_args[1]["deadline"], deadline)
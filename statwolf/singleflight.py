@@ -0,0 +1,66 @@
+from statwolf.exceptions import DeadlineExceededException
+from requests.exceptions import Timeout
+
+import json
+import threading
+
+class Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.shared = 0
+        self.bounded = False
+
+    def expired(self):
+        return isinstance(self.error, DeadlineExceededException) or (self.bounded and isinstance(self.error, Timeout))
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, deadline=None):
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+
+                if leader:
+                    call = Call()
+                    call.bounded = deadline is not None
+                    self._calls[key] = call
+                else:
+                    call.shared += 1
+
+            if leader:
+                break
+
+            if not call.done.wait(None if deadline is None else deadline.remaining()):
+                raise DeadlineExceededException()
+
+            if call.expired():
+                continue
+
+            if call.error is not None:
+                raise call.error
+
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
+
+    def inFlight(self):
+        return len(self._calls)
+
+def key(method, path, body, headers=None):
+    return (method, path, json.dumps(headers, sort_keys=True, separators=(',', ':')), body)
@@ -0,0 +1,186 @@
+from statwolf.exceptions import StatwolfException
+
+import codecs
+import json
+
+DEFAULT_BATCH_SIZE = 10000
+
+_decoder = json.JSONDecoder()
+_whitespace = ' \t\n\r'
+_delimiters = _whitespace + ',:]}'
+
+class RowStream:
+    def __init__(self, chunks, path, batchSize=DEFAULT_BATCH_SIZE):
+        self._chunks = iter(chunks)
+        self._path = path
+        self._batchSize = batchSize
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self.envelope = {}
+        self.found = False
+
+    def __iter__(self):
+        return self.batches()
+
+    def batches(self):
+        levels = self._find()
+
+        if self.found:
+            batch = []
+
+            for row in self._rows():
+                batch.append(row)
+
+                if len(batch) >= self._batchSize:
+                    yield batch
+                    batch = []
+
+            if len(batch) > 0:
+                yield batch
+
+        for envelope in reversed(levels):
+            self._members(envelope)
+
+    def _find(self):
+        levels = []
+        envelope = self.envelope
+
+        for depth, key in enumerate(self._path):
+            if self._peek() != '{':
+                return levels
+
+            self._pos += 1
+            levels.append(envelope)
+
+            if not self._seek(key, envelope):
+                levels.pop()
+                return levels
+
+            last = depth == len(self._path) - 1
+            expected = '[' if last else '{'
+
+            if self._peek() != expected:
+                envelope[key] = self._value()
+                return levels
+
+            if last:
+                self._pos += 1
+                self.found = True
+            else:
+                envelope = envelope.setdefault(key, {})
+
+        return levels
+
+    def _seek(self, key, envelope):
+        while True:
+            name = self._member()
+
+            if name is None:
+                return False
+
+            if name == key:
+                return True
+
+            envelope[name] = self._value()
+
+    def _members(self, envelope):
+        while True:
+            name = self._member()
+
+            if name is None:
+                return
+
+            envelope[name] = self._value()
+
+    def _member(self):
+        c = self._peek()
+
+        if c == ',':
+            self._pos += 1
+            c = self._peek()
+
+        if c == '}':
+            self._pos += 1
+            return None
+
+        name = self._value()
+        self._expect(':')
+
+        return name
+
+    def _rows(self):
+        while True:
+            c = self._peek()
+
+            if c == ']':
+                self._pos += 1
+                return
+
+            if c == ',':
+                self._pos += 1
+                continue
+
+            yield self._decode()
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise StatwolfException('Invalid response: expected ' + char + ' at offset ' + str(self._pos))
+
+        self._pos += 1
+
+    def _peek(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _whitespace:
+                self._pos += 1
+
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+
+            if not self._fill(1):
+                raise StatwolfException('Invalid response: truncated JSON stream')
+
+    def _value(self):
+        self._peek()
+
+        return self._decode()
+
+    def _decode(self):
+        want = 1
+
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+
+                if self._eof or (end < len(self._buffer) and self._buffer[end] in _delimiters):
+                    self._pos = end
+                    return value
+            except ValueError:
+                if self._eof:
+                    raise StatwolfException('Invalid response: malformed JSON at offset ' + str(self._pos))
+
+            want = max(want * 2, len(self._buffer) - self._pos)
+            self._fill(want)
+
+    def _fill(self, amount):
+        if self._pos > 0:
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+        target = len(self._buffer) + amount
+
+        while len(self._buffer) < target:
+            chunk = next(self._chunks, None)
+
+            if chunk is None:
+                self._buffer += self._utf8.decode(b'', True)
+                self._eof = True
+                return False
+
+            self._buffer += self._utf8.decode(chunk)
+
+        return True
+
+def rows(chunks, path, batchSize=DEFAULT_BATCH_SIZE):
+    return RowStream(chunks, path, batchSize)
@@ -7,6 +7,10 @@ from statwolf.http import Http
 from statwolf.tempfile import TempFile
 from itertools import islice
 
+import os
+import subprocess
+import sys
+
 def config():
     return {
         "host": "https://a.statwolf.endpoint/dashboard/path",
@@ -34,6 +38,8 @@ class ContextTestCase(TestCase):
         ctx = Context(config())
         self.assertEqual(ctx.loader, getattr)
         self.assertIs(type(ctx.http), Http)
+        self.assertIs(ctx.codec, ctx.http.codec)
+        self.assertIs(ctx.metrics, ctx.http.metrics)
 
     def test_itCallsTempFileFactory(self):
         ctx = Context(config())
@@ -79,6 +85,35 @@ class ContextTestCase(TestCase):
         self.assertEqual(b, service)
         self.assertEqual(baseUrl, 'the base url')
 
+    def test_itShouldCacheTheBlobServiceForItsTtl(self):
+        class BlobConfig:
+            def json(self):
+                return { "Data": { "connectionString": "the connection string", "baseUrl": "the base url" } }
+
+        now = [ 0 ]
+        ctx = Context(dict(config(), blobTtl=60))
+        ctx.clock = lambda: now[0]
+        ctx._blockBlobService = MagicMock(side_effect=[ 'first', 'second', 'third' ])
+        ctx.http.post = MagicMock(return_value=BlobConfig())
+
+        self.assertEqual(ctx.blob(), ('first', 'the base url'))
+        now[0] = 59
+        self.assertEqual(ctx.blob(), ('first', 'the base url'))
+        self.assertEqual(ctx.http.post.call_count, 1)
+
+        now[0] = 60
+        self.assertEqual(ctx.blob(), ('second', 'the base url'))
+        self.assertEqual(ctx.blob(refresh=True), ('third', 'the base url'))
+        self.assertEqual(ctx.http.post.call_count, 3)
+
+    def test_itShouldCloseTheHttpSession(self):
+        ctx = Context(config())
+        ctx.http.close = MagicMock()
+
+        ctx.close()
+
+        ctx.http.close.assert_called_with()
+
 class InitTestCase(TestCase):
 
     def test_itShouldCreateTheMainService(self):
@@ -100,3 +135,50 @@ class InitTestCase(TestCase):
         with self.assertRaises(statwolf.InvalidConfigException):
             config = {}
             statwolf.create(config, "fake_service")
+
+    def test_itShouldNotImportHeavyDependenciesEagerly(self):
+        script = 'import sys, statwolf; print(",".join(m for m in [ "azure", "dill", "pandas", "asyncio" ] if m in sys.modules))'
+
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        loaded = subprocess.check_output([ sys.executable, '-c', script ], cwd=root).decode().strip()
+
+        self.assertEqual(loaded, '')
+
+    def test_itShouldBuildTheBlobServiceLazily(self):
+        service = statwolf._blockBlobService(connection_string="DefaultEndpointsProtocol=https;AccountName=name;AccountKey=a2V5;EndpointSuffix=core.windows.net")
+
+        self.assertEqual(type(service).__name__, 'BlockBlobService')
+
+class ClientTestCase(TestCase):
+
+    def test_itShouldOwnASingleContext(self):
+        c = statwolf.Client(config())
+
+        self.assertIsInstance(c.context, Context)
+        self.assertIs(c.sql._context, c.context)
+        self.assertIs(c.datasource._context, c.context)
+        self.assertIs(c.fragment._context, c.context)
+        self.assertIs(c.statwolfml._context, c.context)
+
+    def test_itShouldReuseServiceInstances(self):
+        c = statwolf.Client(config())
+
+        self.assertIs(c.sql, c.sql)
+        self.assertIs(c.service("datasource"), c.datasource)
+        self.assertIsInstance(c.sql, statwolf.services.sql.SQL)
+
+    def test_itShouldNotChangeTheCallerConfig(self):
+        conf = config()
+        statwolf.Client(conf)
+
+        self.assertEqual(conf, config())
+
+    def test_itShouldCloseTheContext(self):
+        with statwolf.Client(config()) as c:
+            c.context.close = MagicMock()
+
+        c.context.close.assert_called_with()
+
+    def test_itShouldCheckTheMandatoryConfigFields(self):
+        with self.assertRaises(statwolf.InvalidConfigException):
+            statwolf.Client({})
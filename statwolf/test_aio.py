@@ -0,0 +1,223 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+import asyncio
+import threading
+import statwolf
+
+from statwolf.aio import AsyncClient, AsyncService, Runner
+from statwolf.services import sql, datasource, fragment
+from statwolf.services.datasource import Field, PipelineBuilder
+
+from statwolf.mocks import ContextMock, ResponseMock
+
+class AsyncServiceTestCase(TestCase):
+
+    def setUp(self):
+        self.context = ContextMock()
+        self.runner = Runner(2)
+
+    def tearDown(self):
+        self.runner.shutdown()
+
+    def test_itShouldAwaitNetworkBoundMethods(self):
+        self.context.http.post = MagicMock(return_value=ResponseMock({
+            "Data": { "data": { "data": [ 1 ], "meta": [ 2 ] } }
+        }))
+
+        s = AsyncService(sql.create(self.context), self.runner)
+
+        result = asyncio.run(s.query('select 1'))
+
+        self.assertEqual(result, { "data": [ 1 ], "meta": [ 2 ] })
+
+    def test_itShouldWrapReturnedServices(self):
+        self.context.http.post = MagicMock(return_value=ResponseMock({
+            "Data": { "filters": [ "a filter" ] }
+        }))
+
+        d = AsyncService(datasource.create(self.context), self.runner)
+
+        async def explore():
+            instance = await d.explore('a source')
+            return await instance.filters()
+
+        fields = asyncio.run(explore())
+
+        self.assertIsInstance(fields[0], AsyncService)
+        self.assertIsInstance(fields[0]._target, Field)
+
+    def test_itShouldKeepFluentMethodsSynchronous(self):
+        self.context.http.post = MagicMock(return_value=ResponseMock([{ "data": { "data": [ 42 ] } }]))
+
+        f = AsyncService(fragment.create(self.context), self.runner)
+
+        instance = f.explore('an id').take(10)
+
+        self.assertEqual(instance._target._params, { "take": "10" })
+        self.assertEqual(asyncio.run(instance.data()), [ 42 ])
+
+    def test_itShouldUnwrapArguments(self):
+        pb = AsyncService(PipelineBuilder('sourceid', 'base url', self.context), self.runner)
+        pipeline = pb.steps().build()
+        pipeline._target.execute = MagicMock(return_value=42)
+
+        override = pipeline.query().take("10")
+
+        self.assertEqual(asyncio.run(pipeline.execute(override)), 42)
+        pipeline._target.execute.assert_called_with(override._target)
+
+    def test_itShouldUnwrapServicesInsideLists(self):
+        self.context.http.post = MagicMock(return_value=ResponseMock({
+            "Data": { "filters": [ "a filter", "another" ] }
+        }))
+
+        d = AsyncService(datasource.create(self.context), self.runner)
+
+        async def prefetch():
+            instance = await d.explore('a source')
+            fields = await instance.filters()
+            self.context.http.post = MagicMock(return_value=ResponseMock({ "Data": [ "a value" ] }))
+            return await instance.prefetchValues(fields[:1])
+
+        self.assertEqual(asyncio.run(prefetch()), { "a filter": [ "a value" ] })
+        self.assertEqual(self.context.http.post.call_args[0][1]["field"], "a filter")
+
+    def test_itShouldWrapBulkResults(self):
+        self.context.http.post = MagicMock(return_value=ResponseMock({
+            "Data": { "filters": [ "a filter" ] }
+        }))
+
+        d = AsyncService(datasource.create(self.context), self.runner)
+
+        async def explore():
+            result = await d.exploreMany([ 'a', 'b' ])
+            return result, await result['a'].filters()
+
+        result, fields = asyncio.run(explore())
+
+        self.assertIsInstance(result.results['b'], AsyncService)
+        self.assertIsInstance(fields[0], AsyncService)
+
+    def test_itShouldForwardContainerProtocols(self):
+        self.context.http.post = MagicMock(return_value=ResponseMock({
+            "Data": [ { "sourceid": "a" }, { "sourceid": "b" } ]
+        }))
+
+        d = AsyncService(datasource.create(self.context), self.runner)
+
+        catalogue = asyncio.run(d.catalogue())
+
+        self.assertIn("a", catalogue)
+        self.assertNotIn("c", catalogue)
+        self.assertEqual(len(catalogue), 2)
+        self.assertEqual([ e["sourceid"] for e in catalogue ], [ "a", "b" ])
+
+    def test_itShouldIterateStreamsOnTheExecutor(self):
+        response = ResponseMock({
+            "Data": { "data": { "meta": [], "data": [ { "n": i } for i in range(3) ] } }
+        })
+        threads = []
+
+        def reply(*args, **kwargs):
+            threads.append(threading.get_ident())
+            return response
+
+        self.context.http.post = MagicMock(side_effect=reply)
+        s = AsyncService(sql.create(self.context), self.runner)
+
+        async def collect():
+            threads.append(threading.get_ident())
+            return [ batch async for batch in s.stream('select n', batchSize=2) ]
+
+        self.assertEqual(asyncio.run(collect()), [ [ { "n": 0 }, { "n": 1 } ], [ { "n": 2 } ] ])
+        self.assertNotEqual(threads[0], threads[1])
+
+    def test_itShouldStreamPipelinesAsynchronously(self):
+        self.context.http.post = MagicMock(return_value=ResponseMock({
+            "Data": { "meta": [], "data": [ { "n": i } for i in range(3) ], "hasErrors": False }
+        }))
+
+        pipeline = AsyncService(PipelineBuilder('sourceid', 'base url', self.context), self.runner).steps().build()
+
+        async def collect():
+            return [ len(chunk["dataset"]) async for chunk in pipeline.stream(chunkSize=2) ]
+
+        self.assertEqual(asyncio.run(collect()), [ 2, 1 ])
+
+    def test_itShouldRunConcurrently(self):
+        barrier = threading.Barrier(5, timeout=5)
+        response = ResponseMock({
+            "Data": { "data": { "data": [], "meta": [] } }
+        })
+
+        def reply(*args, **kwargs):
+            barrier.wait()
+            return response
+
+        self.context.http.post = MagicMock(side_effect=reply)
+        runner = Runner(5)
+        s = AsyncService(sql.create(self.context), runner)
+
+        async def many():
+            return await asyncio.gather(*[ s.query('select ' + str(i)) for i in range(5) ])
+
+        try:
+            self.assertEqual(len(asyncio.run(many())), 5)
+        finally:
+            runner.shutdown()
+
+        self.assertEqual(self.context.http.post.call_count, 5)
+
+class CreateAsyncTestCase(TestCase):
+
+    def setUp(self):
+        self.config = {
+            "host": "https://a.statwolf.endpoint/dashboard/path",
+            "username": "the username",
+            "password": "a real password"
+        }
+
+    def test_itShouldCreateAnAsyncService(self):
+        s = statwolf.create_async(self.config, "sql", concurrency=4)
+
+        self.assertIsInstance(s, AsyncService)
+        self.assertEqual(s._runner.concurrency, 4)
+        self.assertEqual(s._context.config["poolMaxSize"], 4)
+        self.assertNotIn("poolMaxSize", self.config)
+        s.close()
+
+    def test_itShouldShareTheContextAcrossServices(self):
+        client = statwolf.create_async(self.config, concurrency=4)
+
+        self.assertIsInstance(client, AsyncClient)
+        self.assertIsInstance(client.sql, AsyncService)
+        self.assertIs(client.sql._target, client.service("sql")._target)
+        self.assertIs(client.datasource._context, client.context)
+        self.assertIs(client.sql._runner, client.datasource._runner)
+        self.assertEqual(client.context.config["poolMaxSize"], 4)
+        client.close()
+
+    def test_itShouldCloseTheRunnerAndTheSession(self):
+        client = statwolf.create_async(self.config)
+        client.context.http.close = MagicMock()
+
+        async def use():
+            async with client:
+                pass
+
+        asyncio.run(use())
+
+        client.context.http.close.assert_called_once_with()
+        with self.assertRaises(RuntimeError):
+            asyncio.run(client.sql.query('select 1'))
+
+    def test_itShouldCloseASingleService(self):
+        s = statwolf.create_async(self.config, "sql")
+        s._context.http.close = MagicMock()
+
+        asyncio.run(s.aclose())
+
+        s._context.http.close.assert_called_once_with()
+        with self.assertRaises(RuntimeError):
+            asyncio.run(s.query('select 1'))
@@ -0,0 +1,151 @@
+from unittest import TestCase
+
+from statwolf import cache
+from statwolf.cache import LRUCache, HintCache
+
+import pandas
+
+class LRUCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.cache = LRUCache(maxSize=2, ttl=10, clock=lambda: self.now)
+
+    def test_itShouldStoreValuesUntilTheTtl(self):
+        self.cache.set('a', 1)
+
+        self.now = 9
+        self.assertEqual(self.cache.get('a'), 1)
+
+        self.now = 10
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(self.cache.entry('a').value, 1)
+
+    def test_itShouldEvictTheLeastRecentlyUsedEntry(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('c'), 3)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_itShouldRenewTouchedEntries(self):
+        self.cache.set('a', 1, tag='"v1"', digest='abc')
+
+        self.now = 15
+        entry = self.cache.touch('a')
+
+        self.assertEqual((entry.tag, entry.digest), ('"v1"', 'abc'))
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertIsNone(self.cache.touch('missing'))
+
+    def test_itShouldInvalidateEntries(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+
+        self.cache.invalidate('a')
+        self.assertIsNone(self.cache.entry('a'))
+
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_itShouldCountHitsAndMisses(self):
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.set('c', 3)
+        self.cache.get('c')
+        self.cache.get('a')
+
+        self.assertEqual(self.cache.stats(), { "hits": 1, "misses": 1, "evictions": 1, "size": 2 })
+
+    def test_itShouldEvictByMemoryBudget(self):
+        c = LRUCache(maxBytes=100, sizeof=len)
+        c.set('a', 'x' * 40)
+        c.set('b', 'x' * 40)
+        c.set('c', 'x' * 40)
+
+        self.assertIsNone(c.get('a'))
+        self.assertEqual(c.stats()["bytes"], 80)
+
+        c.set('b', 'x' * 10)
+        c.set('d', 'x' * 500)
+
+        self.assertIsNone(c.get('d'))
+        self.assertEqual(c.stats()["bytes"], 50)
+
+        c.invalidate('b')
+        self.assertEqual(c.stats()["bytes"], 40)
+
+    def test_itShouldMeasureFrames(self):
+        frame = pandas.DataFrame({ "a": list(range(1000)) })
+
+        self.assertGreaterEqual(cache.sizeof({ "dataset": frame }), 8000)
+        self.assertGreater(cache.sizeof([ "abc", 1 ]), 0)
+
+    def test_itShouldBuildFromConfig(self):
+        c = cache.create({ "schemaCacheSize": 5, "schemaTtl": 60 }, "schema", 128, 300)
+        d = cache.create({}, "schema", 128, 300)
+
+        self.assertEqual((c.maxSize, c.ttl), (5, 60))
+        self.assertEqual((d.maxSize, d.ttl), (128, 300))
+
+class HintCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.hints = HintCache(LRUCache(), limit=10)
+
+    def test_itShouldReturnStoredHints(self):
+        self.assertIsNone(self.hints.lookup('source', 'field', 'ab'))
+
+        self.hints.store('source', 'field', 'ab', [ 'abc', 'xabd', 'ab', 'abab' ])
+        values = self.hints.lookup('source', 'field', 'ab')
+        values.append('mutated')
+
+        self.assertEqual(self.hints.lookup('source', 'field', 'ab'), [ 'abc', 'xabd', 'ab', 'abab' ])
+        self.assertIsNone(self.hints.lookup('other', 'field', 'ab'))
+
+    def test_itShouldNarrowCompleteResultsLocally(self):
+        self.hints.store('source', 'field', None, [ 'Rome', 'Milan', 'Romania' ])
+
+        self.assertEqual(self.hints.lookup('source', 'field', 'rom'), [ 'Rome', 'Romania' ])
+        self.assertEqual(self.hints.lookup('source', 'field', 'an'), [ 'Milan', 'Romania' ])
+        self.assertEqual(self.hints.stats(), { "hits": 0, "narrowed": 2, "misses": 0, "evictions": 0, "size": 3 })
+
+    def test_itShouldNarrowByPrefix(self):
+        self.hints.match = 'prefix'
+        self.hints.store('source', 'field', 'r', [ 'Rome', 'Romania', 'Turin' ])
+
+        self.assertEqual(self.hints.lookup('source', 'field', 'ro'), [ 'Rome', 'Romania' ])
+
+    def test_itShouldNotNarrowTruncatedResults(self):
+        self.hints.limit = 3
+        self.hints.store('source', 'field', 'a', [ 'ab', 'ac', 'ad' ])
+
+        self.assertIsNone(self.hints.lookup('source', 'field', 'ab'))
+
+        self.hints.limit = None
+        self.hints.store('source', 'field', 'b', [ 'b' ])
+
+        self.assertIsNone(self.hints.lookup('source', 'field', 'bc'))
+
+    def test_itShouldNotCacheInvalidReplies(self):
+        self.hints.store('source', 'field', 'a', False)
+
+        self.assertIsNone(self.hints.lookup('source', 'field', 'a'))
+
+    def test_itShouldInvalidateASource(self):
+        self.hints.store('source', 'field', 'a', [ 'a' ])
+        self.hints.store('other', 'field', 'a', [ 'a' ])
+
+        self.hints.invalidate('source')
+
+        self.assertIsNone(self.hints.lookup('source', 'field', 'a'))
+        self.assertEqual(self.hints.lookup('other', 'field', 'a'), [ 'a' ])
+
+    def test_itShouldBuildFromConfig(self):
+        hints = cache.hints({ "hintLimit": 50, "hintMatch": "prefix", "hintTtl": 5 }, 1024, 60)
+
+        self.assertEqual((hints.limit, hints.match, hints.entries.ttl), (50, 'prefix', 5))
@@ -0,0 +1,55 @@
+from unittest import TestCase, skipUnless
+from unittest.mock import MagicMock
+
+from statwolf import codec, StatwolfException
+from statwolf.codec import Json
+
+payload = {
+    "meta": [{ "name": "city", "type": "String" }, { "name": "sessions", "type": "UInt64" }],
+    "data": [{ "city": "Napoli", "sessions": 42 }, { "city": "Zürich", "sessions": 1.5 }]
+}
+
+class CodecTestCase(TestCase):
+
+    def test_itShouldDefaultToTheStdlib(self):
+        self.assertIsInstance(codec.create(), Json)
+
+    def test_itShouldRoundTripBytes(self):
+        for name in codec.available():
+            c = codec.create(name)
+            encoded = c.dumps(payload)
+
+            self.assertIsInstance(encoded, bytes)
+            self.assertEqual(c.loads(encoded), payload)
+
+    def test_itShouldEncodeCanonically(self):
+        for name in codec.available():
+            c = codec.create(name)
+
+            self.assertEqual(codec.canonical(c, { "b": 1, "a": { "d": 2, "c": 3 } }), codec.canonical(c, { "a": { "c": 3, "d": 2 }, "b": 1 }))
+            self.assertEqual(c.loads(codec.canonical(c, payload)), payload)
+
+    def test_itShouldFallBackToDumpsForCanonicalEncoding(self):
+        custom = MagicMock(spec=[ 'dumps' ])
+        custom.dumps = MagicMock(return_value=b'{}')
+
+        self.assertEqual(codec.canonical(custom, { "a": 1 }), b'{}')
+
+    def test_itShouldPickTheFastestInstalledCodec(self):
+        c = codec.create('auto')
+
+        self.assertEqual(c.name, ([ n for n in [ 'orjson', 'ujson' ] if n in codec.available() ] + [ 'json' ])[0])
+
+    def test_itShouldAcceptACustomCodec(self):
+        custom = object()
+
+        self.assertIs(codec.create(custom), custom)
+
+    def test_itShouldExceptOnUnknownCodecs(self):
+        with self.assertRaises(StatwolfException):
+            codec.create('yolo')
+
+    @skipUnless('ujson' not in codec.available(), 'ujson is installed')
+    def test_itShouldExceptOnMissingCodecs(self):
+        with self.assertRaises(StatwolfException):
+            codec.create('ujson')
@@ -0,0 +1,24 @@
+from unittest import TestCase
+
+from statwolf import compression, StatwolfException
+from statwolf.compression import Gzip
+
+import gzip
+
+class CompressionTestCase(TestCase):
+
+    def test_itShouldBeDisabledByDefault(self):
+        self.assertIsNone(compression.create(None))
+
+    def test_itShouldGzipTheBody(self):
+        c = compression.create('gzip')
+
+        self.assertIsInstance(c, Gzip)
+        self.assertEqual(gzip.decompress(c.compress(b'some data')), b'some data')
+
+    def test_itShouldExceptOnUnknownCompressions(self):
+        with self.assertRaises(StatwolfException):
+            compression.create('lz4')
+
+    def test_itShouldNegotiateTheSupportedEncodings(self):
+        self.assertIn('gzip', compression.acceptEncoding())
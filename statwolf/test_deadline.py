@@ -0,0 +1,45 @@
+from unittest import TestCase
+
+from statwolf import deadline, DeadlineExceededException
+from statwolf.deadline import Deadline
+
+class DeadlineTestCase(TestCase):
+
+    def setUp(self):
+        self.now = 100
+        self.deadline = Deadline(10, clock=lambda: self.now)
+
+    def test_itShouldTrackTheRemainingBudget(self):
+        self.assertEqual(self.deadline.remaining(), 10)
+
+        self.now = 104
+        self.assertEqual(self.deadline.remaining(), 6)
+        self.assertFalse(self.deadline.expired())
+
+        self.now = 120
+        self.assertEqual(self.deadline.remaining(), 0)
+        self.assertTrue(self.deadline.expired())
+
+    def test_itShouldBoundTheTransportTimeouts(self):
+        self.assertEqual(self.deadline.timeout(3, 300), (3, 10))
+
+        self.now = 108
+        self.assertEqual(self.deadline.timeout(3, 300), (2, 2))
+
+    def test_itShouldExceptWhenExpired(self):
+        self.now = 110
+
+        with self.assertRaises(DeadlineExceededException):
+            self.deadline.check()
+
+        with self.assertRaises(DeadlineExceededException):
+            self.deadline.timeout(3, 300)
+
+    def test_itShouldCreateDeadlinesFromSeconds(self):
+        self.assertIsNone(deadline.create(None))
+        self.assertIs(deadline.create(self.deadline), self.deadline)
+        self.assertIsInstance(deadline.create(5), Deadline)
+
+    def test_itShouldBuildCallOptions(self):
+        self.assertEqual(deadline.options(None), {})
+        self.assertEqual(deadline.options(self.deadline), { "deadline": self.deadline })
@@ -0,0 +1,85 @@
+from unittest import TestCase
+
+from statwolf import frames
+
+import pandas
+from pandas.api.types import is_categorical_dtype, is_datetime64_any_dtype, is_float_dtype, is_integer_dtype, is_object_dtype
+
+class FramesTestCase(TestCase):
+
+    def setUp(self):
+        self.meta = [
+            { "name": "ga:date", "type": "Date" },
+            { "name": "ga:country", "type": "LowCardinality(String)" },
+            { "name": "ga:city", "type": "String" },
+            { "name": "ga:sessions", "type": "UInt64" },
+            { "name": "ga:bounceRate", "type": "Nullable(Float64)" }
+        ]
+        self.rows = [{
+            "ga:date": "2019-01-0" + str(i + 1),
+            "ga:country": "Italy" if i % 2 == 0 else "Spain",
+            "ga:city": "city " + str(i),
+            "ga:sessions": str(i * 10),
+            "ga:bounceRate": None if i == 0 else i / 10
+        } for i in range(6) ]
+
+    def test_itShouldClassifyClickhouseTypes(self):
+        self.assertEqual(frames.kind('Nullable(UInt64)'), 'integer')
+        self.assertEqual(frames.kind('Decimal(9, 2)'), 'float')
+        self.assertEqual(frames.kind("DateTime('Europe/Rome')"), 'datetime')
+        self.assertEqual(frames.kind('LowCardinality(Nullable(String))'), 'string')
+        self.assertEqual(frames.kind("Enum8('a' = 1)"), 'string')
+        self.assertEqual(frames.kind('Array(String)'), None)
+        self.assertEqual(frames.kind(None), None)
+
+    def test_itShouldBuildTypedColumns(self):
+        frame = frames.toDataFrame(self.rows, self.meta)
+
+        self.assertEqual(list(frame.columns), [ m["name"] for m in self.meta ])
+        self.assertTrue(is_datetime64_any_dtype(frame["ga:date"]))
+        self.assertTrue(is_categorical_dtype(frame["ga:country"]))
+        self.assertTrue(is_object_dtype(frame["ga:city"]))
+        self.assertTrue(is_integer_dtype(frame["ga:sessions"]))
+        self.assertTrue(is_float_dtype(frame["ga:bounceRate"]))
+        self.assertEqual(list(frame["ga:sessions"]), [ 0, 10, 20, 30, 40, 50 ])
+        self.assertTrue(pandas.isna(frame["ga:bounceRate"][0]))
+
+    def test_itShouldAcceptColumnarData(self):
+        rows = [ [ r[m["name"]] for m in self.meta ] for r in self.rows ]
+        columns = { m["name"]: [ r[m["name"]] for r in self.rows ] for m in self.meta }
+
+        expected = frames.toDataFrame(self.rows, self.meta)
+
+        pandas.testing.assert_frame_equal(frames.toDataFrame(rows, self.meta), expected)
+        pandas.testing.assert_frame_equal(frames.toDataFrame(columns, self.meta), expected)
+
+    def test_itShouldSkipCategoriesWhenAsked(self):
+        frame = frames.toDataFrame(self.rows, self.meta, categorical=False)
+
+        self.assertTrue(is_object_dtype(frame["ga:country"]))
+        self.assertTrue(is_categorical_dtype(frames.categorize(frame, self.meta)["ga:country"]))
+
+    def test_itShouldRetypeUntypedFrames(self):
+        frame = frames.retype(pandas.DataFrame(self.rows), self.meta)
+
+        pandas.testing.assert_frame_equal(frame, frames.toDataFrame(self.rows, self.meta))
+
+    def test_itShouldFallBackForMissingOrLargeIntegers(self):
+        frame = frames.toDataFrame([ { "n": "1" }, { "n": None } ], [ { "name": "n", "type": "Nullable(Int32)" } ])
+        large = frames.toDataFrame([ { "n": str(2 ** 64 - 1) } ], [ { "name": "n", "type": "UInt64" } ])
+
+        self.assertTrue(is_float_dtype(frame["n"]))
+        self.assertEqual(large["n"][0], 2 ** 64 - 1)
+
+    def test_itShouldKeepUnparsableColumns(self):
+        frame = frames.toDataFrame([ { "n": "1" }, { "n": "not a number" } ], [ { "name": "n", "type": "Int32" } ])
+
+        self.assertEqual(list(frame["n"]), [ "1", "not a number" ])
+
+    def test_itShouldFallBackWithoutAMatchingSchema(self):
+        rows = [ { "a": 1, "b": "x" } ]
+
+        pandas.testing.assert_frame_equal(frames.toDataFrame(rows), pandas.DataFrame(rows))
+        pandas.testing.assert_frame_equal(frames.toDataFrame(rows, 'some meta'), pandas.DataFrame(rows))
+        pandas.testing.assert_frame_equal(frames.toDataFrame(rows, [ { "name": "a", "type": "Int32" } ]), pandas.DataFrame(rows))
+        pandas.testing.assert_frame_equal(frames.toDataFrame([], self.meta), pandas.DataFrame([]))
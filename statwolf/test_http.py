@@ -1,64 +1,451 @@
-﻿from unittest import TestCase
-from unittest.mock import MagicMock
+﻿from unittest import TestCase, skipUnless
+from unittest.mock import MagicMock, call
 
 import statwolf.http as http
+import statwolf.retry as retry
+import statwolf.compression as compression
+import statwolf.codec as codec
 from statwolf.http import Http
+from statwolf import CircuitOpenException, DeadlineExceededException
+from statwolf.deadline import Deadline
+from statwolf.mocks import waitFor
 
-import requests
+from requests.exceptions import ConnectionError, ConnectTimeout, ReadTimeout
+
+import threading
+import datetime
+import gzip
 
 class HttpTestCase(TestCase):
 
+    def setUp(self):
+        self.session = MagicMock()
+        self.session.headers = {}
+        self.r = MagicMock()
+        self.r.Session = MagicMock(return_value=self.session)
+
     def test_itShouldAllocateAnHttpService(self):
         client = http.create({ "host": "http://an.host", "username": "a username", "password": "a password" })
         self.assertIs(type(client), Http)
 
+    def test_itShouldShareAPooledSession(self):
+        config = { "host": "http://an.host", "username": "a username", "password": "a password", "poolConnections": 4, "poolMaxSize": 32 }
+
+        client = Http(self.r, config)
+
+        self.r.Session.assert_called_once_with()
+        self.r.adapters.HTTPAdapter.assert_called_with(pool_connections=4, pool_maxsize=32)
+        adapter = self.r.adapters.HTTPAdapter.return_value
+        self.session.mount.assert_has_calls([
+            call('http://', adapter),
+            call('https://', adapter)
+        ])
+        self.assertEqual(self.session.headers, { "Accept-Encoding": compression.acceptEncoding() })
+
+    def test_itShouldUseDefaultPoolSizes(self):
+        config = { "host": "http://an.host", "username": "a username", "password": "a password" }
+
+        Http(self.r, config)
+
+        self.r.adapters.HTTPAdapter.assert_called_with(pool_connections=10, pool_maxsize=10)
+
+    def test_itShouldDisableKeepAlive(self):
+        config = { "host": "http://an.host", "username": "a username", "password": "a password", "keepAlive": False }
+
+        Http(self.r, config)
+
+        self.assertEqual(self.session.headers["Connection"], "close")
+
+    def test_itShouldCloseTheSession(self):
+        config = { "host": "http://an.host", "username": "a username", "password": "a password" }
+
+        Http(self.r, config).close()
+
+        self.session.close.assert_called_with()
+
+
     def test_itShouldCompileAGetRequest(self):
-        reply = {}
-        requests.get = MagicMock(return_value=reply)
+        reply = MagicMock(status_code=200)
+        self.session.get = MagicMock(return_value=reply)
 
         config = { "host": "http://an.host", "username": "a username", "password": "a password" }
 
-        client = Http(requests, config)
+        client = Http(self.r, config)
         response = client.get('/a path')
 
         headers = {
             "statwolf-auth": "a username:a password"
         }
 
-        requests.get.assert_called_with('http://an.host/a path', headers=headers)
-        self.assertEqual(reply, response);
+        self.session.get.assert_called_with('http://an.host/a path', headers=headers, timeout=(10.0, 300.0))
+        self.assertEqual(reply, response._raw);
 
     def test_itShouldCompileAnEmptyPostRequest(self):
-        reply = {}
-        requests.post = MagicMock(return_value=reply)
+        reply = MagicMock(status_code=200)
+        self.session.post = MagicMock(return_value=reply)
 
         config = { "host": "http://an.host", "username": "a username", "password": "a password" }
 
-        client = Http(requests, config)
+        client = Http(self.r, config)
         response = client.post('/a path')
 
         headers = {
             "statwolf-auth": "a username:a password"
         }
 
-        requests.post.assert_called_with('http://an.host/a path', headers=headers)
-        self.assertEqual(reply, response);
+        self.session.post.assert_called_with('http://an.host/a path', headers=headers, timeout=(10.0, 300.0))
+        self.assertEqual(reply, response._raw);
 
 
     def test_itShouldCompileAPostRequest(self):
-        reply = {}
-        requests.post = MagicMock(return_value=reply)
+        reply = MagicMock(status_code=200)
+        self.session.post = MagicMock(return_value=reply)
 
         config = { "host": "http://an.host", "username": "a username", "password": "a password" }
 
         data = { "some": "data" }
 
-        client = Http(requests, config)
+        client = Http(self.r, config)
         response = client.post('/a path', data)
 
         headers = {
-            "statwolf-auth": "a username:a password"
+            "statwolf-auth": "a username:a password",
+            "Content-Type": "application/json"
         }
 
-        requests.post.assert_called_with('http://an.host/a path', json=data, headers=headers)
-        self.assertEqual(reply, response);
+        self.session.post.assert_called_with('http://an.host/a path', data=b'{"some":"data"}', headers=headers, timeout=(10.0, 300.0))
+        self.assertEqual(reply, response._raw);
+
+    def _client(self, **options):
+        config = { "host": "http://an.host", "username": "a username", "password": "a password", "retries": 2 }
+        config.update(options)
+
+        client = Http(self.r, config)
+        client._retry.sleep = MagicMock()
+        client._retry.random = MagicMock(return_value=1)
+
+        return client
+
+    def test_itShouldRetryIdempotentEndpoints(self):
+        ok = MagicMock(status_code=200)
+        self.session.post = MagicMock(side_effect=[ MagicMock(status_code=502), ConnectionError(), ok ])
+
+        client = self._client()
+        response = client.post('/v1/full/getSchema', { "sourceid": "a" })
+
+        self.assertEqual(response._raw, ok)
+        self.assertEqual(self.session.post.call_count, 3)
+        client._retry.sleep.assert_has_calls([ call(0.1), call(0.2) ])
+
+    def test_itShouldGiveUpAfterTheRetryBudget(self):
+        self.session.get = MagicMock(side_effect=ConnectionError())
+
+        client = self._client()
+
+        with self.assertRaises(ConnectionError):
+            client.get('/fragment/an id/discover')
+
+        self.assertEqual(self.session.get.call_count, 3)
+
+    def test_itShouldReturnTheLastFailedResponse(self):
+        failed = MagicMock(status_code=503)
+        self.session.post = MagicMock(return_value=failed)
+
+        client = self._client()
+
+        self.assertEqual(client.post('/v1/full/getHints', {})._raw, failed)
+        self.assertEqual(self.session.post.call_count, 3)
+
+    def test_itShouldNotRetryNonIdempotentEndpoints(self):
+        failed = MagicMock(status_code=502)
+        self.session.post = MagicMock(return_value=failed)
+
+        client = self._client()
+
+        self.assertEqual(client.post('/v1/datasetimport/manageDatasetCreation', {})._raw, failed)
+        self.assertEqual(self.session.post.call_count, 1)
+
+        self.session.post = MagicMock(side_effect=ConnectionError())
+        with self.assertRaises(ConnectionError):
+            client.post('/v1/datasetimport/manageDatasetCreation', {})
+        self.assertEqual(self.session.post.call_count, 1)
+
+    def test_itShouldRetryUnsentNonIdempotentRequests(self):
+        ok = MagicMock(status_code=200)
+        self.session.post = MagicMock(side_effect=[ ConnectTimeout(), ok ])
+
+        client = self._client()
+
+        self.assertEqual(client.post('/v1/freehandquery/$$base', {})._raw, ok)
+
+    def test_itShouldFailFastWhenTheCircuitIsOpen(self):
+        self.session.post = MagicMock(return_value=MagicMock(status_code=502))
+
+        client = self._client(retries=0, circuitThreshold=2)
+        client.post('/v1/full/getSchema', {})
+        client.post('/v1/full/getSchema', {})
+
+        with self.assertRaises(CircuitOpenException):
+            client.post('/v1/full/getSchema', {})
+
+        self.assertEqual(self.session.post.call_count, 2)
+
+    def _blockingPost(self, reply):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+        def post(url, **args):
+            self.started.set()
+            self.release.wait(5)
+            return reply
+
+        self.session.post = MagicMock(side_effect=post)
+
+    def test_itShouldCoalesceIdenticalInFlightRequests(self):
+        reply = MagicMock(status_code=200, content=b'{"Data":42}')
+        self._blockingPost(reply)
+
+        client = self._client()
+        results = []
+
+        def worker(body):
+            results.append(client.post('/v1/full/getSchema', body))
+
+        leader = threading.Thread(target=worker, args=({ "a": 1, "b": 2 },))
+        leader.start()
+        self.assertTrue(self.started.wait(5))
+
+        followers = [ threading.Thread(target=worker, args=({ "b": 2, "a": 1 },)) for i in range(3) ]
+        for t in followers:
+            t.start()
+        call = list(client._flights._calls.values())[0]
+        waitFor(lambda: call.shared == 3)
+        self.release.set()
+        for t in [ leader ] + followers:
+            t.join()
+
+        self.assertEqual(self.session.post.call_count, 1)
+        self.assertEqual(len(results), 4)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEqual([ r.json() for r in results ], [ { "Data": 42 } ] * 4)
+        client.codec.loads = MagicMock(return_value={ "Data": 42 })
+        self.assertEqual([ r.json() for r in results ], [ { "Data": 42 } ] * 4)
+        client.codec.loads.assert_not_called()
+        self.assertEqual(client._flights.inFlight(), 0)
+
+    @skipUnless('orjson' in codec.available(), 'orjson is not installed')
+    def test_itShouldCoalesceBodiesOnlyTheCodecCanEncode(self):
+        self.session.post = MagicMock(return_value=MagicMock(status_code=200, content=b'{}'))
+
+        client = self._client(codec='orjson')
+        client.post('/v1/full/getSchema', { "since": datetime.datetime(2019, 1, 1), "a": 1 })
+
+        self.assertEqual(self.session.post.call_args[1]["data"], b'{"a":1,"since":"2019-01-01T00:00:00"}')
+
+    def test_itShouldNotCoalesceWrites(self):
+        self.session.post = MagicMock(return_value=MagicMock(status_code=200))
+
+        client = self._client()
+        client._flights.do = MagicMock()
+        client.post('/v1/datasetimport/manageDatasetCreation', {})
+
+        client._flights.do.assert_not_called()
+
+    def test_itShouldDisableCoalescing(self):
+        self.session.post = MagicMock(return_value=MagicMock(status_code=200))
+
+        client = self._client(singleFlight=False)
+        client._flights.do = MagicMock()
+        client.post('/v1/full/getSchema', {})
+
+        client._flights.do.assert_not_called()
+
+    def test_itShouldDecodeTheResponseBytesWithTheCodec(self):
+        self.session.post = MagicMock(return_value=MagicMock(status_code=200, content=b'{"Data":[1,2]}'))
+
+        client = self._client()
+        client.codec = MagicMock(wraps=client.codec)
+        response = client.post('/a path', { "a": 1 })
+
+        self.assertEqual(response.json(), { "Data": [ 1, 2 ] })
+        self.assertEqual(response.json(), { "Data": [ 1, 2 ] })
+        client.codec.loads.assert_called_once_with(b'{"Data":[1,2]}')
+        client.codec.dumps.assert_called_once_with({ "a": 1 })
+
+    def test_itShouldPickTheConfiguredCodec(self):
+        custom = MagicMock()
+
+        self.assertEqual(self._client().codec.name, 'json')
+        self.assertIs(self._client(codec=custom).codec, custom)
+
+    def test_itShouldCompressLargeBodies(self):
+        self.session.post = MagicMock(return_value=MagicMock(status_code=200, content=b'{}'))
+
+        client = self._client(compress='gzip', compressMinSize=10)
+        data = { "statement": "select 1" * 100 }
+        response = client.post('/a path', data)
+
+        args = self.session.post.call_args[1]
+        self.assertEqual(args["headers"]["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(args["data"]), client.codec.dumps(data))
+        self.assertEqual(response.bytesSent, len(args["data"]))
+        self.assertEqual(response.bytesSentRaw, len(client.codec.dumps(data)))
+        self.assertLess(response.bytesSent, response.bytesSentRaw)
+
+    def test_itShouldNotCompressSmallBodies(self):
+        self.session.post = MagicMock(return_value=MagicMock(status_code=200, content=b'{}'))
+
+        client = self._client(compress='gzip')
+        client.post('/a path', { "a": 1 })
+
+        args = self.session.post.call_args[1]
+        self.assertNotIn("Content-Encoding", args["headers"])
+        self.assertEqual(args["data"], b'{"a":1}')
+
+    def test_itShouldCountTheTransferredBytes(self):
+        raw = MagicMock(status_code=200, content=b'{"Data":"a long decompressed reply"}')
+        raw.raw.tell = MagicMock(return_value=12)
+        self.session.post = MagicMock(return_value=raw)
+
+        client = self._client()
+        response = client.post('/a path', { "a": 1 })
+        client.post('/a path', { "a": 1 })
+
+        self.assertEqual(response.bytesReceived, 12)
+        self.assertEqual(response.bytesReceivedRaw, len(raw.content))
+        self.assertEqual(client.counters(), {
+            "requests": 2,
+            "bytesSent": 14,
+            "bytesSentRaw": 14,
+            "bytesReceived": 24,
+            "bytesReceivedRaw": 2 * len(raw.content)
+        })
+
+    def test_itShouldStreamTheResponse(self):
+        raw = MagicMock(status_code=200)
+        raw.iter_content = MagicMock(return_value=iter([ b'{"Data"', b':[1]}' ]))
+        raw.raw.tell = MagicMock(return_value=9)
+        self.session.post = MagicMock(return_value=raw)
+
+        client = self._client()
+        client._flights.do = MagicMock()
+        response = client.post('/v1/full/debugQuery', { "a": 1 }, stream=True)
+
+        self.assertEqual(self.session.post.call_args[1]["stream"], True)
+        client._flights.do.assert_not_called()
+        self.assertEqual(client.counters()["bytesReceivedRaw"], 0)
+
+        self.assertEqual(b''.join(response.iterContent(4)), b'{"Data":[1]}')
+        raw.iter_content.assert_called_with(4)
+        raw.close.assert_called_with()
+        self.assertEqual(response.bytesReceivedRaw, 12)
+        self.assertEqual(response.bytesReceived, 9)
+        self.assertEqual(client.counters()["bytesReceivedRaw"], 12)
+        self.assertEqual(client.counters()["bytesReceived"], 9)
+
+    def test_itShouldInstrumentRequests(self):
+        self.session.post = MagicMock(side_effect=[ MagicMock(status_code=502, content=b'{}'), MagicMock(status_code=200, content=b'{"Data":1}') ])
+
+        client = self._client(root='/root')
+        client.clock = MagicMock(side_effect=[ 1.0, 1.5 ])
+        listener = MagicMock()
+        client.metrics.subscribe(listener)
+
+        client.post('/root/v1/full/getSchema', { "a": 1 })
+
+        event = listener.call_args[0][0]
+        self.assertEqual(event["endpoint"], '/v1/full/getSchema')
+        self.assertEqual(event["method"], 'POST')
+        self.assertEqual(event["status"], 200)
+        self.assertEqual(event["latency"], 0.5)
+        self.assertEqual(event["retries"], 1)
+        self.assertEqual(event["bytesSent"], 7)
+        self.assertEqual(client.metrics.gauge('statwolf_requests_in_flight', endpoint='/v1/full/getSchema'), 0)
+
+    def test_itShouldInstrumentFailures(self):
+        self.session.get = MagicMock(side_effect=ConnectionError())
+
+        client = self._client(retries=0)
+        with self.assertRaises(ConnectionError):
+            client.get('/fragment/an id/discover')
+
+        self.assertEqual(client.metrics.counter('statwolf_requests_total', endpoint='/fragment/{id}/discover', method='GET', status='ConnectionError'), 1)
+        self.assertEqual(client.metrics.gauge('statwolf_requests_in_flight', endpoint='/fragment/{id}/discover'), 0)
+
+    def test_itShouldUseTheConfiguredTimeouts(self):
+        self.session.get = MagicMock(return_value=MagicMock(status_code=200, content=b'{}'))
+
+        client = self._client(connectTimeout=1, readTimeout=2)
+        client.get('/a path')
+
+        self.assertEqual(self.session.get.call_args[1]["timeout"], (1, 2))
+
+    def test_itShouldBoundTimeoutsByTheDeadline(self):
+        self.now = 0
+        self.session.post = MagicMock(side_effect=[ MagicMock(status_code=502, content=b'{}'), MagicMock(status_code=200, content=b'{}') ])
+
+        client = self._client()
+        deadline = Deadline(30, clock=lambda: self.now)
+
+        def sleep(delay):
+            self.now += delay
+        client._retry.sleep = sleep
+
+        client.post('/v1/full/getSchema', {}, deadline=deadline)
+
+        self.assertEqual(self.session.post.call_args_list[0][1]["timeout"], (10.0, 30))
+        self.assertEqual(self.session.post.call_args_list[1][1]["timeout"], (10.0, 29.9))
+
+    def test_itShouldStopRetryingWhenTheDeadlineExpires(self):
+        self.now = 0
+        self.session.post = MagicMock(return_value=MagicMock(status_code=502, content=b'{}'))
+
+        client = self._client(retries=5)
+        client._retry.random = MagicMock(return_value=1)
+        deadline = Deadline(0.25, clock=lambda: self.now)
+
+        def sleep(delay):
+            self.now += delay
+        client._retry.sleep = sleep
+
+        with self.assertRaises(DeadlineExceededException):
+            client.post('/v1/full/getSchema', {}, deadline=deadline)
+
+        self.assertEqual(self.session.post.call_count, 2)
+
+    def test_itShouldReportTimeoutsPastTheDeadline(self):
+        self.now = 0
+        deadline = Deadline(5, clock=lambda: self.now)
+
+        def expire(*args, **kwargs):
+            self.now = 5
+            raise ReadTimeout()
+
+        self.session.post = MagicMock(side_effect=expire)
+        client = self._client(retries=5)
+
+        with self.assertRaises(DeadlineExceededException) as raised:
+            client.post('/v1/full/getSchema', {}, deadline=deadline)
+
+        self.assertIsInstance(raised.exception.__cause__, ReadTimeout)
+        self.assertEqual(self.session.post.call_count, 1)
+
+    def test_itShouldKeepTimeoutsWithinTheDeadline(self):
+        self.now = 0
+        deadline = Deadline(5, clock=lambda: self.now)
+        self.session.post = MagicMock(side_effect=ReadTimeout())
+
+        client = self._client(retries=0)
+
+        with self.assertRaises(ReadTimeout):
+            client.post('/v1/full/getSchema', {}, deadline=deadline)
+
+    def test_itShouldAcceptSecondsAsDeadline(self):
+        self.session.post = MagicMock(return_value=MagicMock(status_code=200, content=b'{}'))
+
+        client = self._client()
+        client.post('/v1/full/getSchema', {}, deadline=5)
+
+        connect, read = self.session.post.call_args[1]["timeout"]
+        self.assertLessEqual(read, 5)
+        self.assertGreater(read, 4)
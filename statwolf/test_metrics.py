@@ -0,0 +1,93 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from statwolf import metrics
+from statwolf.metrics import Registry
+
+def event(**values):
+    e = {
+        "endpoint": "/v1/full/getSchema",
+        "method": "POST",
+        "status": 200,
+        "latency": 0.2,
+        "bytesSent": 10,
+        "bytesReceived": 100,
+        "retries": 0
+    }
+    e.update(values)
+
+    return e
+
+class EndpointTestCase(TestCase):
+
+    def test_itShouldGroupPathsByEndpoint(self):
+        self.assertEqual(metrics.endpoint('/root/v1/full/getSchema', '/root'), '/v1/full/getSchema')
+        self.assertEqual(metrics.endpoint('/root/v1/freehandquery/$$base', '/root'), '/v1/freehandquery')
+        self.assertEqual(metrics.endpoint('/root/v1/datasetimport/env', '/root'), '/v1/datasetimport/env')
+        self.assertEqual(metrics.endpoint('/v1/statwolfml/apply'), '/v1/statwolfml/apply')
+        self.assertEqual(metrics.endpoint('/fragment/an id'), '/fragment/{id}')
+        self.assertEqual(metrics.endpoint('/fragment/an id/discover'), '/fragment/{id}/discover')
+        self.assertEqual(metrics.endpoint('//v1/full/getHints', '/'), '/v1/full/getHints')
+        self.assertEqual(metrics.endpoint('/something/else'), 'other')
+
+class RegistryTestCase(TestCase):
+
+    def test_itShouldTrackInFlightRequests(self):
+        r = Registry()
+
+        r.started('/v1/full/getSchema')
+        r.started('/v1/full/getSchema')
+        self.assertEqual(r.gauge('statwolf_requests_in_flight', endpoint='/v1/full/getSchema'), 2)
+
+        r.finished(event())
+        self.assertEqual(r.gauge('statwolf_requests_in_flight', endpoint='/v1/full/getSchema'), 1)
+
+    def test_itShouldRecordLatenciesSizesAndRetries(self):
+        r = Registry(buckets=[ 0.1, 1.0 ])
+
+        r.started('/v1/full/getSchema')
+        r.finished(event(latency=0.05, retries=2))
+        r.started('/v1/full/getSchema')
+        r.finished(event(latency=0.5, status=502))
+        r.received('/v1/full/getSchema', 'POST', 50)
+
+        h = r.histogram('statwolf_request_duration_seconds', endpoint='/v1/full/getSchema', method='POST')
+        self.assertEqual(h.counts, [ 1, 2 ])
+        self.assertEqual(h.count, 2)
+        self.assertAlmostEqual(h.sum, 0.55)
+        self.assertEqual(r.counter('statwolf_requests_total', endpoint='/v1/full/getSchema', method='POST', status='200'), 1)
+        self.assertEqual(r.counter('statwolf_requests_total', endpoint='/v1/full/getSchema', method='POST', status='502'), 1)
+        self.assertEqual(r.counter('statwolf_request_bytes_total', endpoint='/v1/full/getSchema', method='POST'), 20)
+        self.assertEqual(r.counter('statwolf_response_bytes_total', endpoint='/v1/full/getSchema', method='POST'), 250)
+        self.assertEqual(r.counter('statwolf_retries_total', endpoint='/v1/full/getSchema', method='POST'), 2)
+
+    def test_itShouldNotifyListeners(self):
+        listener = MagicMock()
+        r = Registry().subscribe(listener)
+
+        r.started('/v1/full/getSchema')
+        r.finished(event())
+
+        listener.assert_called_with(event())
+
+    def test_itShouldRenderAPrometheusSnapshot(self):
+        r = Registry(buckets=[ 0.5 ])
+
+        r.started('/fragment/{id}')
+        r.finished(event(endpoint='/fragment/{id}', method='GET', latency=0.25))
+
+        text = r.prometheus()
+
+        self.assertIn('# TYPE statwolf_request_duration_seconds histogram\n', text)
+        self.assertIn('statwolf_request_duration_seconds_bucket{endpoint="/fragment/{id}",method="GET",le="0.5"} 1\n', text)
+        self.assertIn('statwolf_request_duration_seconds_bucket{endpoint="/fragment/{id}",method="GET",le="+Inf"} 1\n', text)
+        self.assertIn('statwolf_request_duration_seconds_sum{endpoint="/fragment/{id}",method="GET"} 0.25\n', text)
+        self.assertIn('statwolf_request_duration_seconds_count{endpoint="/fragment/{id}",method="GET"} 1\n', text)
+        self.assertIn('statwolf_requests_total{endpoint="/fragment/{id}",method="GET",status="200"} 1\n', text)
+        self.assertIn('statwolf_requests_in_flight{endpoint="/fragment/{id}"} 0\n', text)
+
+    def test_itShouldShareAConfiguredRegistry(self):
+        r = Registry()
+
+        self.assertIs(metrics.create({ "metrics": r }), r)
+        self.assertIsInstance(metrics.create({}), Registry)
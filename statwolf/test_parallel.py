@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+from statwolf import parallel
+
+import threading
+
+class ParallelTestCase(TestCase):
+
+    def test_itShouldRunInInputOrder(self):
+        self.assertEqual(parallel.run(lambda x: x * 2, [ 3, 1, 2 ], 3), [ 6, 2, 4 ])
+        self.assertEqual(parallel.run(lambda x: x * 2, [ 3, 1, 2 ], 1), [ 6, 2, 4 ])
+        self.assertEqual(parallel.run(lambda x: x, [], 3), [])
+
+    def test_itShouldRunConcurrently(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        self.assertEqual(parallel.run(lambda x: barrier.wait() * 0 + x, [ 1, 2, 3 ], 3), [ 1, 2, 3 ])
+
+    def test_itShouldSettleEveryItem(self):
+        error = ValueError('boom')
+
+        def fn(x):
+            if x == 2:
+                raise error
+            return x
+
+        self.assertEqual(parallel.settle(fn, [ 1, 2, 3 ], 2), [ (1, None), (None, error), (3, None) ])
+
+    def test_itShouldRaiseTheFirstError(self):
+        def fn(x):
+            raise ValueError(str(x))
+
+        with self.assertRaisesRegex(ValueError, '1'):
+            parallel.run(fn, [ 1, 2 ], 2)
+
+    def test_itShouldCollectResultsAndErrorsByKey(self):
+        error = ValueError('boom')
+
+        def fn(x):
+            if x == 'b':
+                raise error
+            return x.upper()
+
+        result = parallel.bulk(fn, [ 'a', 'b', 'c' ], 2)
+
+        self.assertFalse(result.ok())
+        self.assertEqual(result.results, { 'a': 'A', 'c': 'C' })
+        self.assertEqual(result.errors, { 'b': error })
+        self.assertEqual(result['a'], 'A')
+        self.assertEqual(len(result), 3)
+        with self.assertRaises(ValueError):
+            result['b']
+
+        self.assertTrue(parallel.bulk(fn, [ 'a' ]).ok())
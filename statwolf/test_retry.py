@@ -0,0 +1,104 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from statwolf import retry, CircuitOpenException
+from statwolf.retry import RetryPolicy, CircuitBreaker
+
+from requests.exceptions import ConnectionError, ConnectTimeout
+
+class RetryPolicyTestCase(TestCase):
+
+    def test_itShouldRecognizeIdempotentEndpoints(self):
+        p = RetryPolicy()
+
+        self.assertTrue(p.isIdempotent('/root/v1/full/getSchema'))
+        self.assertTrue(p.isIdempotent('/root/v1/full/debugQuery'))
+        self.assertTrue(p.isIdempotent('/fragment/an id/discover'))
+        self.assertFalse(p.isIdempotent('/root/v1/datasetimport/manageDatasetCreation'))
+        self.assertFalse(p.isIdempotent('/root/v1/full/setDatasetInformation'))
+
+    def test_itShouldBackoffExponentiallyWithJitter(self):
+        p = RetryPolicy(retries=5, backoff=0.5, maxBackoff=3.0)
+        p.random = MagicMock(return_value=0.5)
+
+        self.assertEqual([ p.delay(a) for a in range(5) ], [ 0.25, 0.5, 1.0, 1.5, 1.5 ])
+
+    def test_itShouldRespectTheRetryBudget(self):
+        p = RetryPolicy(retries=1)
+
+        self.assertTrue(p.shouldRetry(0, True))
+        self.assertFalse(p.shouldRetry(1, True))
+        self.assertFalse(p.shouldRetry(0, False, ConnectionError()))
+        self.assertTrue(p.shouldRetry(0, False, ConnectTimeout()))
+
+    def test_itShouldBuildFromConfig(self):
+        p = retry.policy({ "retries": 7, "backoff": 1, "maxBackoff": 10 })
+
+        self.assertEqual((p.retries, p.backoff, p.maxBackoff), (7, 1, 10))
+
+class CircuitBreakerTestCase(TestCase):
+
+    def setUp(self):
+        self.now = 100
+        self.breaker = CircuitBreaker('a host', threshold=2, resetTimeout=10)
+        self.breaker.clock = lambda: self.now
+
+    def test_itShouldOpenAfterTheThreshold(self):
+        self.breaker.failure()
+        self.breaker.allow()
+        self.breaker.failure()
+
+        self.assertTrue(self.breaker.isOpen())
+        with self.assertRaises(CircuitOpenException):
+            self.breaker.allow()
+
+    def test_itShouldLetATrialThroughAfterTheResetTimeout(self):
+        self.breaker.failure()
+        self.breaker.failure()
+
+        self.now = 111
+        self.breaker.allow()
+
+        self.breaker.failure()
+        with self.assertRaises(CircuitOpenException):
+            self.breaker.allow()
+
+        self.now = 122
+        self.breaker.allow()
+        self.breaker.success()
+        self.assertFalse(self.breaker.isOpen())
+
+    def test_itShouldLetOnlyOneTrialThroughWhileHalfOpen(self):
+        self.breaker.failure()
+        self.breaker.failure()
+
+        self.now = 111
+        self.breaker.allow()
+
+        with self.assertRaises(CircuitOpenException):
+            self.breaker.allow()
+
+        self.breaker.success()
+        self.breaker.allow()
+        self.breaker.allow()
+
+    def test_itShouldAllowANewTrialWhenOneNeverReports(self):
+        self.breaker.failure()
+        self.breaker.failure()
+
+        self.now = 111
+        self.breaker.allow()
+
+        self.now = 121
+        self.breaker.allow()
+
+        with self.assertRaises(CircuitOpenException):
+            self.breaker.allow()
+
+    def test_itShouldBuildABreakerFromEachConfig(self):
+        a = retry.breaker({ "host": "http://one", "circuitThreshold": 100 })
+        b = retry.breaker({ "host": "http://one", "circuitThreshold": 2, "circuitReset": 5 })
+
+        self.assertIsNot(a, b)
+        self.assertEqual((a.threshold, a.resetTimeout), (100, 30.0))
+        self.assertEqual((b.threshold, b.resetTimeout), (2, 5))
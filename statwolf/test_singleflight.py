@@ -0,0 +1,93 @@
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from statwolf import singleflight
+from statwolf.singleflight import SingleFlight
+from statwolf.deadline import Deadline
+from statwolf import DeadlineExceededException
+from statwolf.mocks import waitFor
+
+import threading
+
+class SingleFlightTestCase(TestCase):
+
+    def test_itShouldRunSequentialCallsIndependently(self):
+        sf = SingleFlight()
+        fn = MagicMock(side_effect=[ 1, 2 ])
+
+        self.assertEqual(sf.do('key', fn), 1)
+        self.assertEqual(sf.do('key', fn), 2)
+        self.assertEqual(sf.inFlight(), 0)
+
+    def test_itShouldShareTheErrorWithFollowers(self):
+        sf = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        errors = []
+
+        def fn():
+            started.set()
+            release.wait(5)
+            raise ValueError('boom')
+
+        def worker():
+            try:
+                sf.do('key', fn)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [ threading.Thread(target=worker) for i in range(3) ]
+        threads[0].start()
+        self.assertTrue(started.wait(5))
+        for t in threads[1:]:
+            t.start()
+        waitFor(lambda: sf._calls['key'].shared == 2)
+        release.set()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(errors), 3)
+        self.assertTrue(all(e is errors[0] for e in errors))
+        self.assertEqual(sf.inFlight(), 0)
+
+    def test_itShouldNotShareTheLeadersDeadline(self):
+        sf = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+        results = {}
+
+        def fn():
+            calls.append(1)
+            if len(calls) == 1:
+                started.set()
+                release.wait(5)
+                raise DeadlineExceededException()
+            return 'done'
+
+        def worker(name, deadline):
+            try:
+                results[name] = sf.do('key', fn, deadline)
+            except DeadlineExceededException as e:
+                results[name] = e
+
+        leader = threading.Thread(target=worker, args=('leader', Deadline(60)))
+        follower = threading.Thread(target=worker, args=('follower', None))
+        leader.start()
+        self.assertTrue(started.wait(5))
+        follower.start()
+        waitFor(lambda: sf._calls['key'].shared == 1)
+        release.set()
+        leader.join()
+        follower.join()
+
+        self.assertIsInstance(results['leader'], DeadlineExceededException)
+        self.assertEqual(results['follower'], 'done')
+        self.assertEqual(len(calls), 2)
+
+    def test_itShouldKeyOnTheEncodedBody(self):
+        self.assertEqual(singleflight.key('POST', '/a', b'{"a":1}'), singleflight.key('POST', '/a', b'{"a":1}'))
+        self.assertNotEqual(singleflight.key('POST', '/a', b'{"a":1}'), singleflight.key('POST', '/a', b'{"a":2}'))
+        self.assertNotEqual(singleflight.key('POST', '/a', None), singleflight.key('GET', '/a', None))
+        self.assertNotEqual(singleflight.key('POST', '/a', b'{}'), singleflight.key('POST', '/b', b'{}'))
+        self.assertNotEqual(singleflight.key('GET', '/a', None), singleflight.key('GET', '/a', None, { "If-None-Match": "etag" }))
@@ -0,0 +1,91 @@
+from unittest import TestCase
+
+from statwolf import stream, StatwolfException
+
+import json
+
+def chunked(document, size):
+    content = json.dumps(document, indent=1).encode('utf-8')
+    return [ content[i:i + size] for i in range(0, len(content), size) ]
+
+class RowStreamTestCase(TestCase):
+
+    def setUp(self):
+        self.rows = [ { "city": "Zürich" * i, "sessions": i * 1000, "rate": i / 3 } for i in range(25) ]
+        self.document = {
+            "Success": True,
+            "Data": {
+                "data": {
+                    "meta": [ { "name": "city", "type": "String" } ],
+                    "data": self.rows,
+                    "rows": 25
+                },
+                "hints": {}
+            }
+        }
+
+    def test_itShouldYieldFixedSizeBatches(self):
+        for size in [ 1, 3, 64, 100000 ]:
+            rows = stream.rows(chunked(self.document, size), [ 'Data', 'data', 'data' ], 10)
+            batches = list(rows)
+
+            self.assertEqual([ len(b) for b in batches ], [ 10, 10, 5 ])
+            self.assertEqual(sum(batches, []), self.rows)
+            self.assertTrue(rows.found)
+
+    def test_itShouldCollectTheEnvelope(self):
+        rows = stream.rows(chunked(self.document, 5), [ 'Data', 'data', 'data' ], 10)
+        list(rows)
+
+        self.assertEqual(rows.envelope, {
+            "Success": True,
+            "Data": {
+                "data": {
+                    "meta": [ { "name": "city", "type": "String" } ],
+                    "rows": 25
+                },
+                "hints": {}
+            }
+        })
+
+    def test_itShouldHandleMissingRows(self):
+        rows = stream.rows(chunked({ "Success": False, "Data": { "Code": -1, "Message": "an error" } }, 4), [ 'Data', 'data', 'data' ])
+
+        self.assertEqual(list(rows), [])
+        self.assertFalse(rows.found)
+        self.assertEqual(rows.envelope, { "Success": False, "Data": { "Code": -1, "Message": "an error" } })
+
+    def test_itShouldHandleScalarsOnThePath(self):
+        rows = stream.rows(chunked({ "Data": False }, 2), [ 'Data', 'data' ])
+
+        self.assertEqual(list(rows), [])
+        self.assertEqual(rows.envelope, { "Data": False })
+
+    def test_itShouldHandleEmptyArrays(self):
+        rows = stream.rows([ b'{"Data":{"data":[],"hasErrors":true}}' ], [ 'Data', 'data' ])
+
+        self.assertEqual(list(rows), [])
+        self.assertEqual(rows.envelope, { "Data": { "hasErrors": True } })
+
+    def test_itShouldNotTruncateNumbersAcrossChunks(self):
+        rows = stream.rows([ b'{"Data":{"data":[12', b'34,5', b'6]}}' ], [ 'Data', 'data' ])
+
+        self.assertEqual(list(rows), [ [ 1234, 56 ] ])
+
+    def test_itShouldNotSplitNumbersAfterADotOrExponent(self):
+        rows = stream.rows([ b'{"Data":{"data":[2.', b'5]}}' ], [ 'Data', 'data' ])
+
+        self.assertEqual(list(rows), [ [ 2.5 ] ])
+
+    def test_itShouldMatchJsonLoadsWithSingleByteChunks(self):
+        content = b'{"Data":{"total":-1.5e+3,"data":[2.5,-0.25E-2,1e10,7,"a,b]",{"x":[1.0e1]},true,null],"rate":3.25}}'
+        document = json.loads(content)
+
+        rows = stream.rows([ content[i:i + 1] for i in range(len(content)) ], [ 'Data', 'data' ], 3)
+
+        self.assertEqual(sum(list(rows), []), document["Data"]["data"])
+        self.assertEqual(rows.envelope, { "Data": { "total": -1500.0, "rate": 3.25 } })
+
+    def test_itShouldExceptOnTruncatedStreams(self):
+        with self.assertRaises(StatwolfException):
+            list(stream.rows([ b'{"Data":{"data":[{"a":1},{"a"' ], [ 'Data', 'data' ]))